@@ -0,0 +1,415 @@
+from common import *
+from concurrent.futures import ProcessPoolExecutor
+import json
+import time
+import os
+import sys
+
+try:
+    import numpy as np
+except ImportError:
+    print("analyze-spv-corpus.py requires NumPy, install it with 'pip install numpy'", file=sys.stderr)
+    exit(-1)
+
+GRAMMAR_FILE = "spirv.core.grammar.json"
+
+SPIRV_MAGIC = 0x07230203
+SPIRV_MAGIC_SWAPPED = 0x03022307
+HEADER_WORDS = 5
+
+# Sections of a module, in the order the logical layout requires.
+SECTIONS = [
+    "capabilities",
+    "extensions",
+    "imports",
+    "memoryModel",
+    "entryPoints",
+    "executionModes",
+    "debug",
+    "annotations",
+    "globals",
+    "functions",
+]
+
+# Sections of instructions which can not be told apart by their class.
+SECTION_OPCODES = {
+    "OpCapability": "capabilities",
+    "OpExtension": "extensions",
+    "OpExtInstImport": "imports",
+    "OpMemoryModel": "memoryModel",
+    "OpEntryPoint": "entryPoints",
+    "OpExecutionMode": "executionModes",
+    "OpExecutionModeId": "executionModes",
+}
+
+SECTION_CLASSES = {
+    "Debug": "debug",
+    "Annotation": "annotations",
+}
+
+# Id references are counted up to this amount, ids referenced
+# more often share the last bucket.
+FANOUT_BUCKETS = 64
+
+# Per opcode lookup tables, built from the grammar once and
+# shared with the worker processes.
+class AnalyzerTables:
+    def __init__(self, scanner: SpirvGrammarScanner):
+        self.functionOpCode = scanner.getInstructionByName("OpFunction").getOpCode()
+        self.opNames = dict[int, str]()
+        self.decorationNames = dict[int, str]()
+        self.operandKinds = [kind.getKind() for kind in scanner.getOperandKinds()]
+
+        self.sections = np.full(65536, SECTIONS.index("globals"), dtype=np.uint8)
+        self.resultOffsets = np.full(65536, -1, dtype=np.int32)
+        self.decorationOffsets = np.full(65536, -1, dtype=np.int32)
+        self.arbitraryIdStarts = np.full(65536, -1, dtype=np.int32)
+        self.idOffsets = dict[int, tuple[list[int], list[int]]]()
+        self.kindCounts = np.zeros((65536, len(self.operandKinds)), dtype=np.uint16)
+
+        for instr in scanner.getInstructions():
+            opcode = instr.getOpCode()
+            self.opNames[opcode] = instr.getOpName()
+            if instr.getOpName() in SECTION_OPCODES:
+                self.sections[opcode] = SECTIONS.index(SECTION_OPCODES[instr.getOpName()])
+            elif instr.getClass() in SECTION_CLASSES:
+                self.sections[opcode] = SECTIONS.index(SECTION_CLASSES[instr.getClass()])
+
+            for operand in instr.getOperands():
+                if operand.getQuantifier() == None:
+                    self.kindCounts[opcode, self.operandKinds.index(operand.getKind())] += 1
+            self.addOperandOffsets(scanner, instr)
+
+        for enumerant in scanner.getOperandKind("Decoration").getEnumerants():
+            self.decorationNames.setdefault(enumerant.getValue(), enumerant.getName())
+
+    # Finds the word offsets of the operands of [instr], only operands
+    # following single word operands have a fixed offset.
+    def addOperandOffsets(self, scanner: SpirvGrammarScanner, instr: SpirvInstrInfo):
+        opcode = instr.getOpCode()
+        required = list[int]()
+        optional = list[int]()
+
+        offset = 0
+        for operand in instr.getOperands():
+            kind = operand.getKind()
+            info = scanner.getOperandKind(kind)
+            quantifier = operand.getQuantifier()
+
+            if kind == "IdResult":
+                self.resultOffsets[opcode] = offset
+            elif kind == "Decoration":
+                self.decorationOffsets[opcode] = offset
+            elif quantifier == "*":
+
+                # Trailing lists made up of ids only.
+                if kind == "IdRef" or (info.getCategory() == "Composite" and all(base == "IdRef" for base in info.getBases())):
+                    self.arbitraryIdStarts[opcode] = offset
+                break
+            elif info.getCategory() == "Id" and kind != "IdResultType":
+                if quantifier == None:
+                    required.append(offset)
+                else:
+                    optional.append(offset)
+
+            if scanner.getOperandWordRange(kind) != (1, 1):
+                break
+            offset += 1
+
+        if len(required) > 0 or len(optional) > 0:
+            self.idOffsets[opcode] = (required, optional)
+
+    def getOpName(self, opcode: int) -> str:
+        return self.opNames.get(opcode, f"OpUnknown({opcode})")
+
+    def getDecorationName(self, value: int) -> str:
+        return self.decorationNames.get(value, f"Decoration({value})")
+
+# Tables used by analyzeFile in worker processes.
+workerTables: AnalyzerTables = None
+
+def initWorker(tables: AnalyzerTables):
+    global workerTables
+    workerTables = tables
+
+def loadWords(path: str) -> np.ndarray:
+    if os.path.getsize(path) < HEADER_WORDS * 4:
+        raise ValueError("file too small for a SPIR-V header")
+
+    words = np.memmap(path, dtype="<u4", mode="r", shape=(os.path.getsize(path) // 4,))
+    if words[0] == SPIRV_MAGIC_SWAPPED:
+        words = np.memmap(path, dtype=">u4", mode="r", shape=(os.path.getsize(path) // 4,))
+    elif words[0] != SPIRV_MAGIC:
+        raise ValueError("missing SPIR-V magic number")
+    return words
+
+# Finds the first word of every instruction.
+#
+# The start of an instruction depends on the length of the one before
+# it, so the chain of starts is followed by pointer jumping, every step
+# doubling the distance each word jumps, rather than word by word.
+def findInstructionStarts(words: np.ndarray) -> tuple[np.ndarray, bool]:
+    count = len(words)
+    lengths = (words >> 16).astype(np.int64)
+
+    # Words past the end jump to the end, zero lengths are malformed
+    # and would never move on.
+    positions = np.arange(HEADER_WORDS, count, dtype=np.int64)
+    jumps = np.minimum(positions + np.maximum(lengths[HEADER_WORDS:], 1), count)
+    jumps = np.append(jumps, count) - HEADER_WORDS
+
+    reached = np.zeros(count - HEADER_WORDS + 1, dtype=bool)
+    reached[0] = True
+    frontier = np.zeros(1, dtype=np.int64)
+    while len(frontier) > 0:
+        frontier = jumps[frontier]
+        frontier = frontier[~reached[frontier]]
+        reached[frontier] = True
+        if len(frontier) == 0:
+            break
+
+        # Every word now reaches twice as far.
+        jumps = jumps[jumps]
+        frontier = np.flatnonzero(reached)
+
+    # Malformed streams are cut off at the first broken instruction.
+    starts = np.flatnonzero(reached[:-1]) + HEADER_WORDS
+    malformed = False
+    zeros = np.flatnonzero(lengths[starts] == 0)
+    if len(zeros) > 0:
+        starts = starts[:zeros[0]]
+        malformed = True
+    if len(starts) > 0 and starts[-1] + lengths[starts[-1]] > count:
+        starts = starts[:-1]
+        malformed = True
+    return starts, malformed
+
+# Gathers words[first[i]..last[i]] for every i.
+def gatherRanges(words: np.ndarray, first: np.ndarray, last: np.ndarray) -> np.ndarray:
+    counts = np.maximum(last - first, 0)
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.uint32)
+
+    offsets = np.cumsum(counts) - counts
+    indices = np.repeat(first - offsets, counts) + np.arange(total, dtype=np.int64)
+    return np.asarray(words[indices], dtype=np.uint32)
+
+def getIdRefs(tables: AnalyzerTables, words: np.ndarray, starts: np.ndarray, opcodes: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    refs = list[np.ndarray]()
+
+    # Instructions are grouped by opcode, so that every operand
+    # offset is gathered at once for all instructions sharing it.
+    order = np.argsort(opcodes, kind="stable")
+    present, groupStarts = np.unique(opcodes[order], return_index=True)
+    groupEnds = np.append(groupStarts[1:], len(order))
+    for opcode, begin, end in zip(present.tolist(), groupStarts.tolist(), groupEnds.tolist()):
+        group = order[begin:end]
+        groupWords = starts[group] + 1
+        groupLengths = lengths[group]
+
+        if opcode in tables.idOffsets:
+            required, optional = tables.idOffsets[opcode]
+            for offset in required + optional:
+                hasOperand = groupLengths > offset + 1
+                refs.append(np.asarray(words[groupWords[hasOperand] + offset], dtype=np.uint32))
+
+        arbitraryStart = tables.arbitraryIdStarts[opcode]
+        if arbitraryStart >= 0:
+            refs.append(gatherRanges(words, groupWords + arbitraryStart, starts[group] + groupLengths))
+
+    if len(refs) == 0:
+        return np.zeros(0, dtype=np.uint32)
+    return np.concatenate(refs)
+
+def toHistogram(counts: np.ndarray, getName) -> dict[str, int]:
+    return { getName(value): int(counts[value]) for value in np.flatnonzero(counts) }
+
+# Analyzes a single file, returning its report or the error it raised.
+def analyzeFile(path: str, tables: AnalyzerTables = None) -> dict:
+    tables = tables if tables != None else workerTables
+    try:
+        words = loadWords(path)
+    except (OSError, ValueError) as e:
+        return { "path": path, "error": str(e) }
+
+    bound = int(words[3])
+    starts, malformed = findInstructionStarts(words)
+    headers = np.asarray(words[starts], dtype=np.uint32)
+    opcodes = (headers & 0xFFFF).astype(np.int64)
+    lengths = (headers >> 16).astype(np.int64)
+
+    # Everything from the first function on is function code.
+    sections = tables.sections[opcodes].astype(np.int64)
+    functions = np.flatnonzero(opcodes == tables.functionOpCode)
+    if len(functions) > 0:
+        sections[functions[0]:] = SECTIONS.index("functions")
+    sectionWords = np.bincount(sections, weights=lengths, minlength=len(SECTIONS))
+    sectionCounts = np.bincount(sections, minlength=len(SECTIONS))
+
+    # Decorations
+    decorationOffsets = tables.decorationOffsets[opcodes]
+    decorated = np.flatnonzero((decorationOffsets >= 0) & (lengths > decorationOffsets + 1))
+    decorations = np.asarray(words[starts[decorated] + 1 + decorationOffsets[decorated]], dtype=np.int64)
+
+    # Id reference fan-out of every id defined by the module, a module
+    # defines fewer ids than it has words, whatever its bound claims.
+    idLimit = min(bound, len(words))
+    refs = getIdRefs(tables, words, starts, opcodes, lengths)
+    refs = refs[refs < idLimit]
+    fanout = np.bincount(refs, minlength=idLimit)
+    resultOffsets = tables.resultOffsets[opcodes]
+    defining = np.flatnonzero((resultOffsets >= 0) & (lengths > resultOffsets + 1))
+    defined = np.asarray(words[starts[defining] + 1 + resultOffsets[defining]], dtype=np.int64)
+    defined = defined[defined < idLimit]
+    definedFanout = fanout[defined]
+
+    opcodeCounts = np.bincount(opcodes, minlength=65536)
+    present = np.flatnonzero(opcodeCounts)
+    kindCounts = opcodeCounts[present] @ tables.kindCounts[present]
+    return {
+        "path": path,
+        "words": len(words),
+        "instructions": len(starts),
+        "bound": bound,
+        "malformed": malformed,
+        "sections": { name: { "instructions": int(sectionCounts[i]), "words": int(sectionWords[i]) } for i, name in enumerate(SECTIONS) },
+        "opcodes": toHistogram(opcodeCounts, tables.getOpName),
+        "operandKinds": toHistogram(kindCounts, lambda kind: tables.operandKinds[kind]),
+        "decorations": toHistogram(np.bincount(decorations) if len(decorations) > 0 else np.zeros(0), tables.getDecorationName),
+        "fanout": {
+            "refs": len(refs),
+            "ids": len(defined),
+            "max": int(definedFanout.max()) if len(defined) > 0 else 0,
+            "histogram": np.bincount(np.minimum(definedFanout, FANOUT_BUCKETS), minlength=FANOUT_BUCKETS + 1).tolist(),
+        },
+    }
+
+# Sums the reports of every file.
+def aggregate(reports: list[dict]) -> dict:
+    total = {
+        "files": 0,
+        "failed": 0,
+        "malformed": 0,
+        "words": 0,
+        "instructions": 0,
+        "sections": { name: { "instructions": 0, "words": 0 } for name in SECTIONS },
+        "opcodes": dict[str, int](),
+        "operandKinds": dict[str, int](),
+        "decorations": dict[str, int](),
+        "fanout": { "refs": 0, "ids": 0, "max": 0, "histogram": [0] * (FANOUT_BUCKETS + 1) },
+    }
+
+    for report in reports:
+        total["files"] += 1
+        if "error" in report:
+            total["failed"] += 1
+            continue
+
+        total["malformed"] += int(report["malformed"])
+        total["words"] += report["words"]
+        total["instructions"] += report["instructions"]
+        for name, section in report["sections"].items():
+            total["sections"][name]["instructions"] += section["instructions"]
+            total["sections"][name]["words"] += section["words"]
+
+        for key in ("opcodes", "operandKinds", "decorations"):
+            for name, count in report[key].items():
+                total[key][name] = total[key].get(name, 0) + count
+
+        fanout = report["fanout"]
+        total["fanout"]["refs"] += fanout["refs"]
+        total["fanout"]["ids"] += fanout["ids"]
+        total["fanout"]["max"] = max(total["fanout"]["max"], fanout["max"])
+        total["fanout"]["histogram"] = [a + b for a, b in zip(total["fanout"]["histogram"], fanout["histogram"])]
+    return total
+
+def printTop(title: str, histogram: dict[str, int], top: int):
+    total = sum(histogram.values())
+    print(f"\n{title} ({len(histogram)} distinct, {total} total)")
+    for name, count in sorted(histogram.items(), key=lambda item: (-item[1], item[0]))[:top]:
+        print(f"    {name:<48} {count:>12} {count / total * 100:6.2f}%")
+
+def printSummary(total: dict, top: int):
+    print(f"{total['files']} files, {total['failed']} failed, {total['malformed']} malformed")
+    print(f"{total['words'] * 4} bytes, {total['instructions']} instructions")
+
+    print("\nSections")
+    for name, section in total["sections"].items():
+        share = section["words"] / total["words"] * 100 if total["words"] > 0 else 0
+        print(f"    {name:<48} {section['instructions']:>12} instructions {section['words'] * 4:>14} bytes {share:6.2f}%")
+
+    printTop("Opcodes", total["opcodes"], top)
+    printTop("Operand kinds (required operands)", total["operandKinds"], top)
+    printTop("Decorations", total["decorations"], top)
+
+    fanout = total["fanout"]
+    print(f"\nId fan-out ({fanout['ids']} ids, {fanout['refs']} references, max {fanout['max']})")
+    # Buckets are shown in ranges doubling in size.
+    histogram = fanout["histogram"]
+    low = 0
+    while low <= FANOUT_BUCKETS:
+        high = min(max(low * 2 - 1, low), FANOUT_BUCKETS - 1) if low < FANOUT_BUCKETS else FANOUT_BUCKETS
+        count = sum(histogram[low:high+1])
+        label = f"{low}+" if low == FANOUT_BUCKETS else (f"{low}" if low == high else f"{low}-{high}")
+        print(f"    {label:<48} {count:>12} {count / max(fanout['ids'], 1) * 100:6.2f}%")
+        low = high + 1
+
+def findFiles(paths: list[str]) -> list[str]:
+    files = list[str]()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith(".spv"))
+        else:
+            files.append(path)
+    return files
+
+def parseOption(argv: list[str], option: str, default: str) -> str | None:
+    for arg in argv:
+        if arg.startswith(option + "="):
+            return arg[len(option)+1:]
+        if arg == option:
+            return default
+    return None
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    jobs = max(1, int(parseOption(sys.argv[1:], "--jobs", "0") or os.cpu_count() or 1))
+    top = int(parseOption(sys.argv[1:], "--top", "20") or 20)
+    jsonPath = parseOption(sys.argv[1:], "--json", "corpus-report.json")
+
+    if len(args) == 0:
+        print("analyze-spv-corpus.py [--jobs=N] [--top=N] [--json[=FILE]] <files or directories...>")
+        exit(-1)
+
+    files = findFiles(args)
+    begin = time.perf_counter()
+    tables = AnalyzerTables(SpirvGrammarScanner(GRAMMAR_FILE))
+
+    # Small files are cheap to analyze, so they are handed
+    # to the workers in chunks.
+    if jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(files)), initializer=initWorker, initargs=(tables,)) as pool:
+            reports = list(pool.map(analyzeFile, files, chunksize=max(1, len(files) // (jobs * 8))))
+    else:
+        reports = [analyzeFile(path, tables) for path in files]
+
+    for report in reports:
+        if "error" in report:
+            print(f"{report['path']}: {report['error']}", file=sys.stderr)
+        elif report["malformed"]:
+            print(f"{report['path']}: malformed instruction stream", file=sys.stderr)
+
+    total = aggregate(reports)
+    printSummary(total, top)
+    print(f"\nanalyzed in {time.perf_counter()-begin:.2f}s")
+
+    if jsonPath != None:
+        with open(jsonPath, "w") as f:
+            json.dump({ "aggregate": total, "files": reports }, f, indent=4)
+        print(f"report written to {jsonPath}")
+
+if __name__ == "__main__":
+    main()
@@ -115,6 +115,9 @@ d_keywords = [
     "__vector",
 ]
 
+# Word count used for operands and instructions with no upper bound.
+UNBOUNDED_WORDS = 65535
+
 class SpirvOperandInfo:
     def __init__(self, data: dict[str, str]):
         self.kind = data["kind"]
@@ -138,6 +141,104 @@ class SpirvOperandInfo:
     def getName(self) -> str:
         return self.name
 
+# Summary of the operand list of a Spirv instruction.
+#
+# Computed once per instruction, emitters should read operand
+# layout information from here instead of walking the operands.
+class SpirvOperandSummary:
+    __slots__ = (
+        "resultIndex",
+        "resultTypeIndex",
+        "minimumSize",
+        "maximumSize",
+        "optionalCount",
+        "idRefIndices",
+        "optionalIdRefIndices",
+        "arbitraryIdRefStart",
+        "variadicIndices",
+        "literalStringIndices",
+        "operandTypes",
+    )
+
+    def __init__(self, operands: list[SpirvOperandInfo]):
+        resultIndex = None
+        resultTypeIndex = None
+        minimumSize = 0
+        maximumSize = 0
+        optionalCount = 0
+        idRefs = list[int]()
+        optionalIdRefs = list[int]()
+        arbitraryIdRefStart = None
+        variadic = list[int]()
+        literalStrings = list[int]()
+
+        for i, operand in enumerate(operands):
+            kind = operand.getKind()
+            quantifier = operand.getQuantifier()
+
+            if kind == "IdResult":
+                resultIndex = i
+            elif kind == "IdResultType":
+                resultTypeIndex = i
+            elif kind == "LiteralString":
+                literalStrings.append(i)
+
+            if quantifier == None:
+                minimumSize += 1
+            elif quantifier == "*":
+                variadic.append(i)
+                optionalCount = 65535
+            elif optionalCount != 65535:
+                optionalCount += 1
+
+            if kind == "LiteralString" or kind == "Decoration" or quantifier == "*":
+                maximumSize = 65535
+            elif maximumSize != 65535:
+                maximumSize += 1
+
+            if kind == "IdRef":
+                if quantifier == None:
+                    idRefs.append(i)
+                elif quantifier == "?":
+                    optionalIdRefs.append(i)
+                elif quantifier == "*":
+                    arbitraryIdRefStart = i
+
+        object.__setattr__(self, "resultIndex", resultIndex)
+        object.__setattr__(self, "resultTypeIndex", resultTypeIndex)
+        object.__setattr__(self, "minimumSize", minimumSize)
+        object.__setattr__(self, "maximumSize", maximumSize)
+        object.__setattr__(self, "optionalCount", optionalCount)
+        object.__setattr__(self, "idRefIndices", tuple(idRefs))
+        object.__setattr__(self, "optionalIdRefIndices", tuple(optionalIdRefs))
+        object.__setattr__(self, "arbitraryIdRefStart", arbitraryIdRefStart)
+        object.__setattr__(self, "variadicIndices", tuple(variadic))
+        object.__setattr__(self, "literalStringIndices", tuple(literalStrings))
+        object.__setattr__(self, "operandTypes", tuple(operand.getKind() for operand in operands))
+
+    def __setattr__(self, name: str, value: any):
+        raise AttributeError(f"SpirvOperandSummary is immutable, can't set {name}")
+
+    # Pickling support, summaries are shared with emitter processes.
+    def __getstate__(self) -> dict[str, any]:
+        return { name: getattr(self, name) for name in SpirvOperandSummary.__slots__ }
+
+    def __setstate__(self, state: dict[str, any]):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def hasResult(self) -> bool:
+        return self.resultIndex != None
+
+    def hasResultType(self) -> bool:
+        return self.resultTypeIndex != None
+
+    def hasArbitraryIdRefs(self) -> bool:
+        return self.arbitraryIdRefStart != None
+
+    def hasIdRefs(self) -> bool:
+        return len(self.idRefIndices) > 0 or len(self.optionalIdRefIndices) > 0 or self.hasArbitraryIdRefs()
+
 # Information about a Spirv instruction
 class SpirvInstrInfo:
     def __parseOperand(self, operand: dict[str]):
@@ -145,12 +246,17 @@ class SpirvInstrInfo:
 
     def __init__(self, instr: dict):
         self.opname: str = instr["opname"]
-        self.opclass: str = instr["class"]
+        self.opclass: str = instr["class"] if "class" in instr else None
         self.opcode: int = instr["opcode"]
+        self.aliases: list[str] = instr["aliases"] if "aliases" in instr else list[str]()
+        self.capabilities: list[str] = instr["capabilities"] if "capabilities" in instr else list[str]()
+        self.extensions: list[str] = instr["extensions"] if "extensions" in instr else list[str]()
+        self.version: str = instr["version"] if "version" in instr else None
         self.operands = list[SpirvOperandInfo]()
         if "operands" in instr:
             for operand in instr["operands"]:
                 self.__parseOperand(operand)
+        self.summary = SpirvOperandSummary(self.operands)
 
     def getOpName(self) -> str:
         return self.opname
@@ -160,69 +266,143 @@ class SpirvInstrInfo:
 
     def getClass(self) -> str:
         return self.opclass
+
+    def getAliases(self) -> list[str]:
+        return self.aliases
+
+    def getCapabilities(self) -> list[str]:
+        return self.capabilities
+
+    def getExtensions(self) -> list[str]:
+        return self.extensions
+
+    def getVersion(self) -> str:
+        return self.version
+
+    def getSummary(self) -> SpirvOperandSummary:
+        return self.summary
     
     def hasResult(self) -> bool:
-        for operand in self.operands:
-            if operand.getKind() == "IdResult":
-                return True
-        return False
+        return self.summary.hasResult()
 
     def hasResultType(self) -> bool:
-        for operand in self.operands:
-            if operand.getKind() == "IdResultType":
-                return True
-        return False
+        return self.summary.hasResultType()
 
     def getOperands(self) -> list[SpirvOperandInfo]:
         return self.operands
 
     def getOperandTypes(self) -> list[str]:
-        mList = list[str]()
+        return list(self.summary.operandTypes)
 
-        for operand in self.operands:
-            mList.append(operand.getKind())
+    def getOptionalOperandCount(self) -> int:
+        return self.summary.optionalCount
 
-        return mList
+    def getMinimumSize(self) -> int:
+        return self.summary.minimumSize
+    
+    def getMaximumSize(self) -> int:
+        return self.summary.maximumSize
 
-    def getOptionalOperandCount(self) -> int:
-        counter = 0
+# Information about a single enumerant of an operand kind
+class SpirvEnumerantInfo:
+    def __init__(self, enumerant: dict):
+        self.name: str = enumerant["enumerant"]
+        self.value: int = int(enumerant["value"], 0) if isinstance(enumerant["value"], str) else enumerant["value"]
+        self.aliases: list[str] = enumerant["aliases"] if "aliases" in enumerant else list[str]()
+        self.capabilities: list[str] = enumerant["capabilities"] if "capabilities" in enumerant else list[str]()
+        self.extensions: list[str] = enumerant["extensions"] if "extensions" in enumerant else list[str]()
+        self.version: str = enumerant["version"] if "version" in enumerant else None
+        self.parameters = list[SpirvOperandInfo]()
+        if "parameters" in enumerant:
+            for parameter in enumerant["parameters"]:
+                self.parameters.append(SpirvOperandInfo(parameter))
 
-        for operand in self.operands:
-            if operand.getQuantifier() != None:
-                if operand.getQuantifier() == "*":
-                    return 65535
-                else:
-                    counter += 1
-                
-        return counter
+    def getName(self) -> str:
+        return self.name
 
+    def getValue(self) -> int:
+        return self.value
 
-    def getMinimumSize(self) -> int:
-        counter = 0
+    def getAliases(self) -> list[str]:
+        return self.aliases
 
-        for operand in self.operands:
-            if operand.getQuantifier() == None:
-                counter += 1
-                
-        return counter
-    
-    def getMaximumSize(self) -> int:
-        counter = 0
-
-        for operand in self.operands:
-            if operand.getKind() == "LiteralString":
-                return 65535
-            elif operand.getKind() == "Decoration":
-                return 65535
-            elif operand.getQuantifier() != None:
-                if operand.getQuantifier() == "*":
-                    return 65535
-                else:
-                    counter += 1
-            else:
-                counter += 1
-                
-        return counter
+    def getCapabilities(self) -> list[str]:
+        return self.capabilities
+
+    def getExtensions(self) -> list[str]:
+        return self.extensions
+
+    def getVersion(self) -> str:
+        return self.version
+
+    def getParameters(self) -> list[SpirvOperandInfo]:
+        return self.parameters
+
+# Information about an operand kind
+class SpirvOperandKindInfo:
+    def __init__(self, kind: dict):
+        self.kind: str = kind["kind"]
+        self.category: str = kind["category"]
+        self.bases: list[str] = kind["bases"] if "bases" in kind else list[str]()
+        self.enumerants = list[SpirvEnumerantInfo]()
+        if "enumerants" in kind:
+            for enumerant in kind["enumerants"]:
+                self.enumerants.append(SpirvEnumerantInfo(enumerant))
+
+    def getKind(self) -> str:
+        return self.kind
+
+    def getCategory(self) -> str:
+        return self.category
+
+    def getBases(self) -> list[str]:
+        return self.bases
+
+    def getEnumerants(self) -> list[SpirvEnumerantInfo]:
+        return self.enumerants
+
+    def isEnum(self) -> bool:
+        return self.category == "BitEnum" or self.category == "ValueEnum"
+
+    def isBitEnum(self) -> bool:
+        return self.category == "BitEnum"
+
+# Information about an extended instruction set, such as GLSL.std.450
+class SpirvExtInstSetInfo:
+    def __init__(self, name: str, grammarFile: str):
+        self.name = name
+        with open(file=grammarFile, mode="r") as file:
+            grammarJson = json.load(file)
+
+        self.version: int = grammarJson["version"] if "version" in grammarJson else 0
+        self.revision: int = grammarJson["revision"] if "revision" in grammarJson else 0
+
+        # Extended instructions are numbered within their set.
+        self.instructions = list[SpirvInstrInfo]()
+        for instr in grammarJson["instructions"]:
+            self.instructions.append(SpirvInstrInfo(instr))
+        self.instructions.sort(key=lambda instr: instr.getOpCode())
+
+        # "GLSL.std.450" becomes glslStd450.
+        parts = name.split(".")
+        first = parts[0].lower() if parts[0].isupper() else parts[0][0].lower() + parts[0][1:]
+        self.dName = toDName(first + "".join(part[0].upper() + part[1:] for part in parts[1:]))
+
+    # Gets the name used to import the set with OpExtInstImport.
+    def getName(self) -> str:
+        return self.name
+
+    def getDName(self) -> str:
+        return self.dName
+
+    def getVersion(self) -> int:
+        return self.version
+
+    def getRevision(self) -> int:
+        return self.revision
+
+    def getInstructions(self) -> list[SpirvInstrInfo]:
+        return self.instructions
 
 class SpirvClassInfo:
     def __init__(self, klass: dict):
@@ -246,7 +426,7 @@ class SpirvClassInfo:
 class SpirvGrammarScanner:
     
     """Constructor"""
-    def __init__(self, grammarFile: str) -> None:
+    def __init__(self, grammarFile: str, extInstGrammars: dict[str, str] = None) -> None:
         
         # Load JSON
         with open(file=grammarFile, mode="r") as file:
@@ -261,24 +441,153 @@ class SpirvGrammarScanner:
                 self.classes.append(SpirvClassInfo(klass))
 
 
+        # Lookup indices, built once while scanning.
+        self.opcodeIndex = dict[int, int]()
+        self.nameIndex = dict[str, SpirvInstrInfo]()
+        self.aliasIndex = dict[str, str]()
+        self.classIndex = dict[str, list[SpirvInstrInfo]]()
+
         # Scan through all instructions and add them.
         # While omitting duplicates.
         for instr in self.grammarJson["instructions"]:
-            toAdd = SpirvInstrInfo(instr)
-            if (self.findInstruction(toAdd.getOpCode())) == -1:
-                self.instructions.append(toAdd)
+            self.addInstruction(SpirvInstrInfo(instr))
+
+        # Scan operand kinds.
+        self.operandKinds = dict[str, SpirvOperandKindInfo]()
+        self.wordRanges = dict[str, tuple[int, int]]()
+        if "operand_kinds" in self.grammarJson:
+            for kind in self.grammarJson["operand_kinds"]:
+                self.operandKinds[kind["kind"]] = SpirvOperandKindInfo(kind)
+
+        # Collect every extension named by the grammar.
+        extensions = set[str]()
+        for instr in self.instructions:
+            extensions.update(instr.getExtensions())
+
+        for kind in self.operandKinds.values():
+            for enumerant in kind.getEnumerants():
+                extensions.update(enumerant.getExtensions())
+        self.extensions: list[str] = sorted(extensions)
+
+        # Scan extended instruction sets, keyed by their import name.
+        self.extInstSets = list[SpirvExtInstSetInfo]()
+        if extInstGrammars != None:
+            for name, extInstGrammar in extInstGrammars.items():
+                self.extInstSets.append(SpirvExtInstSetInfo(name, extInstGrammar))
+
+    def addInstruction(self, instr: SpirvInstrInfo) -> bool:
+        if instr.getOpCode() in self.opcodeIndex:
+            return False
+
+        self.opcodeIndex[instr.getOpCode()] = len(self.instructions)
+        self.instructions.append(instr)
+
+        self.nameIndex[instr.getOpName()] = instr
+        for alias in instr.getAliases():
+            self.aliasIndex[alias] = instr.getOpName()
+
+        if instr.getClass() not in self.classIndex:
+            self.classIndex[instr.getClass()] = list[SpirvInstrInfo]()
+        self.classIndex[instr.getClass()].append(instr)
+        return True
 
     def findInstruction(self, opcode: int) -> int:
-        for i, instr in enumerate(self.instructions):
-            if instr.getOpCode() == opcode:
-                return i
-        return -1
+        return self.opcodeIndex.get(opcode, -1)
+
+    def getInstruction(self, opcode: int) -> SpirvInstrInfo | None:
+        idx = self.findInstruction(opcode)
+        return self.instructions[idx] if idx != -1 else None
+
+    def getInstructionByName(self, opname: str) -> SpirvInstrInfo | None:
+        return self.nameIndex.get(self.getCanonicalName(opname))
+
+    def getInstructionsForClass(self, tag: str) -> list[SpirvInstrInfo]:
+        return self.classIndex.get(tag, list[SpirvInstrInfo]())
+
+    def getCanonicalName(self, opname: str) -> str:
+        return self.aliasIndex.get(opname, opname)
     
     def getInstructions(self) -> list[SpirvInstrInfo]:
         return self.instructions
     
     def getClasses(self) -> list[SpirvClassInfo]:
-        return self.classes    
+        return self.classes
+
+    def getOperandKinds(self) -> list[SpirvOperandKindInfo]:
+        return list(self.operandKinds.values())
+
+    def getOperandKind(self, kind: str) -> SpirvOperandKindInfo | None:
+        return self.operandKinds.get(kind)
+
+    def getExtensions(self) -> list[str]:
+        return self.extensions
+
+    def getExtInstSets(self) -> list[SpirvExtInstSetInfo]:
+        return self.extInstSets
+
+    # Gets the minimum and maximum amount of words a single
+    # operand of the given kind takes up, including the
+    # parameters its enumerants may add.
+    def getOperandWordRange(self, kind: str) -> tuple[int, int]:
+        if kind in self.wordRanges:
+            return self.wordRanges[kind]
+
+        info = self.operandKinds[kind]
+        if info.getCategory() == "Composite":
+            wordRange = self.getWordRangeFor([SpirvOperandInfo({ "kind": base }) for base in info.getBases()])
+
+        elif info.isEnum():
+            ranges = [self.getWordRangeFor(enumerant.getParameters()) for enumerant in info.getEnumerants()]
+            if info.isBitEnum():
+
+                # Every bit may be set at the same time.
+                maxWords = 1 + sum([r[1] for r in ranges])
+            else:
+                maxWords = 1 + max([r[1] for r in ranges], default=0)
+            wordRange = (1, min(maxWords, UNBOUNDED_WORDS))
+
+        elif kind in ("LiteralString", "LiteralContextDependentNumber", "LiteralSpecConstantOpInteger"):
+
+            # Strings are null terminated, context dependent numbers
+            # depend on the width of their type and spec constant ops
+            # are followed by the operands of the opcode they name.
+            wordRange = (1, UNBOUNDED_WORDS)
+
+        else:
+            wordRange = (1, 1)
+
+        self.wordRanges[kind] = wordRange
+        return wordRange
+
+    # Gets the minimum and maximum amount of words a list of operands
+    # takes up.
+    def getWordRangeFor(self, operands: list[SpirvOperandInfo]) -> tuple[int, int]:
+        minWords = 0
+        maxWords = 0
+        for operand in operands:
+            operandMin, operandMax = self.getOperandWordRange(operand.getKind())
+            if operand.getQuantifier() == None:
+                minWords += operandMin
+
+            if operand.getQuantifier() == "*":
+                maxWords = UNBOUNDED_WORDS
+            else:
+                maxWords = min(maxWords + operandMax, UNBOUNDED_WORDS)
+        return (minWords, maxWords)
+
+    # Gets the minimum and maximum amount of operand words for an
+    # instruction.
+    def getWordRange(self, instr: SpirvInstrInfo) -> tuple[int, int]:
+        return self.getWordRangeFor(instr.getOperands())
+
+# Converts a grammar version string such as "1.3" to the
+# SPIR-V version word, "None" and missing versions become 0.
+def toVersionWord(version: str) -> int:
+    if version == None or version == "None":
+        return 0
+
+    major, minor = version.split(".")
+    return (int(major) << 16) | (int(minor) << 8)
 
 def isDKeyword(text: str) -> bool:
     return text in d_keywords
@@ -1,80 +1,118 @@
 import itertools
-import datetime
 import common
-
+import time
+
+# Sections emitted by module emitters while profiling, None when
+# not profiling. See beginProfile and endProfile.
+profileSections: list[dict[str, any]] | None = None
+
+# Starts recording the time and size of every top level
+# emitable written by a module emitter.
+def beginProfile() -> None:
+    global profileSections
+    profileSections = list[dict[str, any]]()
+
+# Stops recording and returns the recorded sections.
+def endProfile() -> list[dict[str, any]]:
+    global profileSections
+    sections = profileSections if profileSections != None else list[dict[str, any]]()
+    profileSections = None
+    return sections
+
+# Output buffer shared by an entire tree of emitables.
+#
+# Text is appended as a list of chunks and joined once in finish(),
+# indentation is tracked as a stack of prefixes which are written
+# at the start of every line, so nested emitables write straight
+# into their parent's output instead of being re-indented.
 class Emitter:
-    def __indent(self, indentation: int = 0):
-        self.code += "    " * indentation
-    
+    INDENT = "    "
+
+    def __prefix(self, extra_indentation: int = 0):
+        if self.atLineStart:
+            self.chunks.append(self.indents[-1] + Emitter.INDENT * extra_indentation)
+            self.atLineStart = False
+
     def __init__(self):
-        self.code: str = ""
-        self.indentation: int = 0
+        self.chunks: list[str] = list[str]()
+        self.indents: list[str] = [""]
+        self.atLineStart: bool = True
         pass
 
     def clear(self):
-        self.code = ""
+        self.chunks.clear()
+        self.indents = [""]
+        self.atLineStart = True
+
+    def add(self, text: str = "", extra_indentation: int = 0):
+        for i, part in enumerate(text.split("\n")):
+            if i > 0:
+                self.__prefix(extra_indentation)
+                self.chunks.append("\n")
+                self.atLineStart = True
+
+            if len(part) > 0:
+                self.__prefix(extra_indentation)
+                self.chunks.append(part)
 
-    def add(self, text: str = ""):
-        self.code += text
-    
     def addLines(self, source: str = "", extra_indentation: int = 0):
         for line in source.splitlines(False):
             self.addLine(line, extra_indentation)
 
     def addLine(self, line: str = "", extra_indentation: int = 0) -> None:
-        if len(line) == 0:
-            self.__indent(self.indentation + extra_indentation)
-            self.code += "\n"
-        
-        for l in line.splitlines(True):
-            self.__indent(self.indentation + extra_indentation)
-            self.code += l + "\n"
+        self.add(line, extra_indentation)
+        self.__prefix(extra_indentation)
+        self.chunks.append("\n")
+        self.atLineStart = True
+
+    def endLine(self) -> None:
+        if not self.atLineStart:
+            self.chunks.append("\n")
+            self.atLineStart = True
 
     def beginScope(self, newLine: bool = True) -> None:
-        self.__indent()
         if newLine:
-            self.code += "\n"
-        self.indentation += 1
+            self.add("\n")
+        self.indents.append(self.indents[-1] + Emitter.INDENT)
 
     def endScope(self) -> None:
-        self.indentation -= 1
-        self.__indent()
-    
+        self.indents.pop()
+
     def finish(self) -> str:
-        return self.code
+        code = "".join(self.chunks)
+        self.chunks = [code]
+        return code
 
 class Emitable:
     def __init__(self):
         self.emitters: list[Emitable] = list[Emitable]()
-        self.emitter = Emitter()
 
     def add(self, emitter: 'Emitable') -> 'Emitable':
         self.emitters.append(emitter)
         return self
 
-    def clear(self):
-        self.emitter.clear()
+    def emitTo(self, out: Emitter) -> None:
+        for emitter in self.emitters:
+            emitter.emitTo(out)
+            out.endLine()
 
     def emit(self) -> str:
-        for emitter in self.emitters:
-            emitter.clear()
-            self.emitter.addLines(emitter.emit())
-        return self.emitter.finish()
-    
+        out = Emitter()
+        self.emitTo(out)
+        return out.finish()
+
 class DocCommentEmitter(Emitable):
 
     def __init__(self, comment: str):
         super().__init__()
         self.comment = comment
 
-    def emit(self) -> str:
-        self.clear()
-        self.emitter.add("/**")
-        self.emitter.beginScope()
-        self.emitter.addLines(self.comment)
-        self.emitter.endScope()
-        self.emitter.addLine("*/")
-        return self.emitter.finish()
+    def emitTo(self, out: Emitter) -> None:
+        out.add("/**")
+        out.beginScope()
+        out.addLines(self.comment)
+        out.endScope()
+        out.addLine("*/")
 
 class ModuleEmitter(Emitable):
 
@@ -82,8 +120,8 @@ class ModuleEmitter(Emitable):
         super().__init__()
         self.module_name = module_name
 
-    def clear(self):
-        self.emitter.addLines(f'''
+    def emitHeader(self, out: Emitter) -> None:
+        out.addLines(f'''
 /**
     SPIR-V Reflection Data
 
@@ -91,8 +129,8 @@ class ModuleEmitter(Emitable):
     manually!
     
     Copyright:
-        Copyright © {datetime.date.today().year}, Kitsunebi Games
-        Copyright © {datetime.date.today().year}, Inochi2D Project
+        Copyright © 2025, Kitsunebi Games
+        Copyright © 2025, Inochi2D Project
     
     License:    $(LINK2 http://www.boost.org/LICENSE_1_0.txt, Boost License 1.0)
     Authors:
@@ -102,22 +140,34 @@ module spirv.{self.module_name};
 import spirv.spv;
 ''')
 
-    def emit(self) -> str:
-        self.clear()
-        self.emitter.addLine()
-        for emitter in self.emitters:
-            for line in emitter.emit().splitlines(False):
-                self.emitter.addLine(line)
-            self.emitter.addLine()
-        return self.emitter.finish()
+    def emitTo(self, out: Emitter) -> None:
+        self.emitHeader(out)
+        out.addLine()
+        for i, emitter in enumerate(self.emitters):
+            start = len(out.chunks)
+            begin = time.perf_counter()
+
+            emitter.emitTo(out)
+            out.endLine()
+
+            if profileSections != None:
+                text = "".join(out.chunks[start:])
+                name = getattr(emitter, "name", None)
+                profileSections.append({
+                    "name": name if name != None else f"{type(emitter).__name__}#{i}",
+                    "emitSeconds": time.perf_counter()-begin,
+                    "lines": text.count("\n"),
+                    "bytes": len(text.encode("utf-8")),
+                })
+            out.addLine()
 
 class FuncParameter(Emitable):
     def __init__(self, type: str, name: str):
         self.type = type;
         self.name = name;
 
-    def emit(self) -> str:
-        return f"{self.type} {self.name}"
+    def emitTo(self, out: Emitter) -> None:
+        out.add(f"{self.type} {self.name}")
 
 class FuncEmitter(Emitable):
     def __init__(self, returnType: str, name: str, params: list[FuncParameter]):
@@ -134,22 +184,20 @@ class FuncEmitter(Emitable):
         self.comment = DocCommentEmitter(comment)
         return self
 
-    def emit(self) -> str:
-        self.clear()
+    def emitTo(self, out: Emitter) -> None:
         if self.comment != None:
-            self.emitter.add(self.comment.emit())
-        
-        self.emitter.add(f"{self.returnType} {self.name}(")
+            self.comment.emitTo(out)
+
+        out.add(f"{self.returnType} {self.name}(")
         for i, param in enumerate(self.params):
-            self.emitter.add(param.emit())
+            param.emitTo(out)
             if (i+1 != len(self.params)):
-                self.emitter.add(", ")
-        self.emitter.add(") @nogc {\n")
-        self.emitter.beginScope(False)
-        super().emit()
-        self.emitter.endScope()
-        self.emitter.addLine("}")
-        return self.emitter.finish()
+                out.add(", ")
+        out.add(") @nogc {\n")
+        out.beginScope(False)
+        super().emitTo(out)
+        out.endScope()
+        out.addLine("}")
 
 class IfEmitter(Emitable):
     def __init__(self):
@@ -160,125 +208,222 @@ class IfEmitter(Emitable):
         self.conditions.append(condition)
         self.emitters.append(body)
         return self
-    
+
     def addElse(self, body: Emitable) -> 'IfEmitter':
         self.conditions.append("else")
         self.emitters.append(body)
         return self
 
-    def emit(self) -> str:
-        self.clear()
+    def emitTo(self, out: Emitter) -> None:
         crange = list(zip(self.conditions, self.emitters))
         for i, (condition, emitable) in enumerate(crange):
             if i+1 == len(crange) and condition == "else":
-                self.emitter.addLine(f"{{")
+                out.addLine(f"{{")
             elif i == 0 or condition != "else":
-                self.emitter.addLine(f"if ({condition}) {{")
-                
-            
-            self.emitter.beginScope()
-            self.emitter.addLines(emitable.emit())
-            self.emitter.endScope()
-            self.emitter.add("}")
+                out.addLine(f"if ({condition}) {{")
 
-            if i+1 < len(crange):
-                self.emitter.add(" else ")
-                
 
-        return self.emitter.finish()
+            out.beginScope()
+            emitable.emitTo(out)
+            out.endLine()
+            out.endScope()
+            out.add("}")
+
+            if i+1 < len(crange):
+                out.add(" else ")
 
 class SwitchEmitter(Emitable):
     def __init__(self, caseArg: str, prefix: str):
         super().__init__()
         self.caseArg = caseArg
         self.prefix = prefix
-        self.cases: dict[Emitter, list[str]] = dict[Emitter, list[str]]()
-        self.default: Emitter = None
+        self.cases: dict[Emitable, list[str]] = dict[Emitable, list[str]]()
+        self.default: Emitable = None
 
-    def addCaseBody(self, to: 'Emitter') -> 'SwitchEmitter':
+    def addCaseBody(self, to: 'Emitable') -> 'SwitchEmitter':
         if to not in self.cases:
             self.cases[to] = list[str]()
 
-    def addCase(self, case: str, to: 'Emitter') -> 'SwitchEmitter':
+    def addCase(self, case: str, to: 'Emitable') -> 'SwitchEmitter':
         if to not in self.cases:
             self.cases[to] = list[str]()
-        
+
         self.cases[to].append(case)
         return self
-    
-    def setDefault(self, to: 'Emitter') -> 'SwitchEmitter':
+
+    def setDefault(self, to: 'Emitable') -> 'SwitchEmitter':
         self.default = to
         return self
-    
-    def emit_case(self, case: str, to: 'Emitter'):
-        
+
+    def emit_case(self, out: Emitter, case: str, to: 'Emitable'):
+
         if len(case) > 0:
             if case == "default":
-                self.emitter.addLine("default:")
+                out.addLine("default:")
             elif len(self.prefix) > 0:
-                self.emitter.addLine(f"case {self.prefix}.{case}:")
+                out.addLine(f"case {self.prefix}.{case}:")
             else:
-                self.emitter.addLine(f"case {case}:")
-            
+                out.addLine(f"case {case}:")
+
         if to != None:
-            self.emitter.beginScope(False)
-            self.emitter.addLines(to.emit())
-            self.emitter.endScope()
+            out.beginScope(False)
+            to.emitTo(out)
+            out.endLine()
+            out.endScope()
 
-    def emit(self) -> str:
-        self.clear()
+    def emitTo(self, out: Emitter) -> None:
         if self.default == None:
-            self.emitter.add("final ")
-        self.emitter.addLine(f"switch ({self.caseArg}) {{")
-        self.emitter.beginScope(False)
+            out.add("final ")
+        out.addLine(f"switch ({self.caseArg}) {{")
+        out.beginScope(False)
         if self.default != None:
-            self.emit_case("default", self.default)
-            self.emitter.addLine()
-        
+            self.emit_case(out, "default", self.default)
+            out.addLine()
+
         for body, keys in self.cases.items():
             for key in keys:
-                self.emit_case(key, None)
-            self.emit_case("", body)
+                self.emit_case(out, key, None)
+            self.emit_case(out, "", body)
 
 
-        self.emitter.endScope()
-        self.emitter.addLine("}")
-        return self.emitter.finish()
+        out.endScope()
+        out.addLine("}")
 
 class BodyEmitter(Emitable):
     def __init__(self, body: str):
         super().__init__()
-        self.emitter.addLines(body)
-        self.body = self.emitter.finish()
-    
-    def emit(self) -> str:
-        return self.body
+        self.lines = body.splitlines(False)
+
+    def emitTo(self, out: Emitter) -> None:
+        for line in self.lines:
+            out.addLine(line)
 
 
 class EnumEmitter(Emitable):
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, base: str = None):
         super().__init__()
         self.name = common.toPascalCase(name);
+        self.base = base
         self.elements = list[tuple[str, str]]()
-    
+
     def add(self, name: str, convertCase: bool = False):
         toInsert = (common.toCamelCase(name) if convertCase else name, None)
         self.elements.append(toInsert)
-    
+
     def addKV(self, name: str, value: any, convertCase: bool = False):
         toInsert = (common.toCamelCase(name) if convertCase else name, str(value))
         self.elements.append(toInsert)
 
-    def emit(self) -> str:
-        self.clear()
-        self.emitter.addLine(f"enum {self.name} {{")
-        self.emitter.beginScope()
+    def emitTo(self, out: Emitter) -> None:
+        if self.base != None:
+            out.addLine(f"enum {self.name} : {self.base} {{")
+        else:
+            out.addLine(f"enum {self.name} {{")
+        out.beginScope()
         for element in self.elements:
             if element[1] != None:
-                self.emitter.addLine(f"{element[0]} = {element[1]},")
+                out.addLine(f"{element[0]} = {element[1]},")
             else:
-                self.emitter.addLine(f"{element[0]},")
-        self.emitter.endScope()
-        self.emitter.addLine("}")
-        return self.emitter.finish()
\ No newline at end of file
+                out.addLine(f"{element[0]},")
+        out.endScope()
+        out.addLine("}")
+
+
+class TableEmitter(Emitable):
+
+    def __init__(self, type: str, name: str, size: int | str = None, qualifiers: str = "immutable"):
+        super().__init__()
+        self.type = type
+        self.name = name
+        self.size = size
+        self.qualifiers = qualifiers
+        self.rows = list[tuple[str, str, str]]()
+        self.comment = None
+
+    def setComment(self, comment: str) -> 'TableEmitter':
+        self.comment = DocCommentEmitter(comment)
+        return self
+
+    def addRow(self, value: any, key: str = None, comment: str = None) -> 'TableEmitter':
+        self.rows.append((key, str(value), comment))
+        return self
+
+    def emitTo(self, out: Emitter) -> None:
+        if self.comment != None:
+            self.comment.emitTo(out)
+
+        size = len(self.rows) if self.size == None else self.size
+        out.addLine(f"{self.qualifiers} {self.type}[{size}] {self.name} = [")
+        out.beginScope(False)
+        for key, value, comment in self.rows:
+            line = f"{key}: {value}," if key != None else f"{value},"
+            if comment != None:
+                line += f" // {comment}"
+            out.addLine(line)
+        out.endScope()
+        out.addLine("];")
+
+
+# Two level table of records indexed by opcode.
+#
+# Opcodes are split in to pages of (1 << pageShift) records, only pages
+# containing at least one opcode are emitted. A small page index maps
+# the upper bits of an opcode to its page, which keeps the sparse vendor
+# opcode ranges cheap while lookups stay O(1).
+class OpcodeTableEmitter(Emitable):
+
+    def __init__(self, type: str, name: str, lookupName: str, pageShift: int = 6):
+        super().__init__()
+        self.type = type
+        self.name = name
+        self.lookupName = lookupName
+        self.pageShift = pageShift
+        self.comment = None
+        self.rows = dict[int, tuple[str, str]]()
+
+    def setComment(self, comment: str) -> 'OpcodeTableEmitter':
+        self.comment = comment
+        return self
+
+    def addRow(self, opcode: int, value: any, comment: str = None) -> 'OpcodeTableEmitter':
+        self.rows[opcode] = (str(value), comment)
+        return self
+
+    def emitTo(self, out: Emitter) -> None:
+        pageMask = (1 << self.pageShift)-1
+        pages = sorted(set([opcode >> self.pageShift for opcode in self.rows.keys()]))
+        assert len(pages) < 255, "Too many opcode table pages for a ubyte page index!"
+
+        pageCount = pages[-1]+1 if len(pages) > 0 else 0
+        pageIndex = TableEmitter("ubyte", f"{self.name}PageIndex", pageCount, qualifiers="private immutable")
+        table = TableEmitter(self.type, self.name, len(pages) << self.pageShift, qualifiers="private immutable")
+
+        pageSlots = dict[int, int]()
+        for slot, page in enumerate(pages):
+            pageSlots[page] = slot
+
+        pageIndices = [str(pageSlots[page]) if page in pageSlots else "ubyte.max" for page in range(pageCount)]
+        for i in range(0, len(pageIndices), 8):
+            pageIndex.addRow(", ".join(pageIndices[i:i+8]))
+
+        for opcode, (value, comment) in sorted(self.rows.items()):
+            table.addRow(value, str((pageSlots[opcode >> self.pageShift] << self.pageShift) | (opcode & pageMask)), comment)
+
+        lookup = FuncEmitter(f"ref immutable({self.type})", self.lookupName, [FuncParameter("Op", "code")])
+        if self.comment != None:
+            lookup.setComment(self.comment)
+
+        lookup.add(BodyEmitter(f"""static immutable {self.type} unknown;
+
+size_t page = code >> {self.pageShift};
+if (page >= {self.name}PageIndex.length || {self.name}PageIndex[page] == ubyte.max)
+    return unknown;
+
+return {self.name}[({self.name}PageIndex[page] << {self.pageShift}) | (code & {pageMask})];"""))
+
+        pageIndex.emitTo(out)
+        out.addLine()
+        table.emitTo(out)
+        out.addLine()
+        lookup.emitTo(out)
@@ -0,0 +1,207 @@
+from common import *
+from d_emit import *
+import io
+
+# Redefine them for completion
+scanner: SpirvGrammarScanner = scanner
+file: io.FileIO = file
+
+module = ModuleEmitter("extinst")
+
+# The operands of an extended instruction follow the result type,
+# result, set and instruction number operands of OpExtInst.
+OPERAND_START = 4
+
+# Extended instruction sets
+extInstSets = EnumEmitter("SpirvExtInstSet", "ubyte")
+extInstSets.add("unknown")
+for extInstSet in scanner.getExtInstSets():
+    extInstSets.add(extInstSet.getDName())
+module.add(extInstSets)
+
+module.add(BodyEmitter(f"""/**
+    Index of the first operand of an extended instruction
+    in the operands of [Op.OpExtInst].
+*/
+enum SpirvExtInstOperandStart = {OPERAND_START};
+
+/**
+    Packed reflection information about a single extended instruction.
+*/
+struct SpirvExtInstInfo {{
+@nogc nothrow:
+
+    /**
+        Minimum number of operands, not counting
+        the operands of [Op.OpExtInst] itself.
+    */
+    ubyte minLength;
+
+    /**
+        Maximum number of operands, [ubyte.max] if unbounded.
+    */
+    ubyte maxLength;
+
+    /**
+        Start of the ID reference offsets in the ID reference offset pool.
+    */
+    ushort idRefStart;
+
+    /**
+        Required (low nibble) and optional (high nibble) ID reference counts.
+    */
+    ubyte idRefCounts;
+
+    /**
+        Operand index at which arbitrary ID references start,
+        [ubyte.max] if the instruction has none.
+    */
+    ubyte arbitraryStart = ubyte.max;
+
+    /**
+        Number of required ID references.
+    */
+    uint getRequiredCount() const {{
+        return idRefCounts & 0x0F;
+    }}
+
+    /**
+        Number of optional ID references.
+    */
+    uint getOptionalCount() const {{
+        return idRefCounts >> 4;
+    }}
+}}
+
+// Range of the instructions of a set in the instruction table,
+// indexed by instruction number.
+private
+struct SpirvExtInstRange {{
+    ushort start;
+    ushort count;
+}}"""))
+
+extInstSetNames = TableEmitter("string", "extInstSetNames", qualifiers="private immutable")
+extInstSetNames.addRow("null", comment="SpirvExtInstSet.unknown")
+
+extInstRanges = TableEmitter("SpirvExtInstRange", "extInstRanges", qualifiers="private immutable")
+extInstRanges.addRow("SpirvExtInstRange(0, 0)", comment="SpirvExtInstSet.unknown")
+
+idRefPoolData = list[int]()
+idRefPoolOffsets = dict[tuple[int, ...], int]()
+tableRows = list[tuple[int, str, str]]()
+nameRows = list[tuple[int, str]]()
+tableSize = 0
+
+for extInstSet in scanner.getExtInstSets():
+    extInstSetNames.addRow(f"\"{extInstSet.getName()}\"", comment=f"SpirvExtInstSet.{extInstSet.getDName()}")
+
+    # Sets are stored densely from instruction 0 up, the few
+    # gaps in their numbering are left as unknown instructions.
+    start = tableSize
+    count = max([instr.getOpCode() for instr in extInstSet.getInstructions()], default=-1)+1
+    extInstRanges.addRow(f"SpirvExtInstRange({start}, {count})", comment=f"SpirvExtInstSet.{extInstSet.getDName()}")
+    tableSize += count
+
+    for instruction in extInstSet.getInstructions():
+        summary = instruction.getSummary()
+        operands = instruction.getOperands()
+
+        # Offsets are stored as operand indices of OpExtInst.
+        idRefs = tuple(i+OPERAND_START for i in summary.idRefIndices)
+        optionalIdRefs = tuple(i+OPERAND_START for i in summary.optionalIdRefIndices)
+        assert len(idRefs) < 16 and len(optionalIdRefs) < 16, f"Too many ID references in {instruction.getOpName()}!"
+
+        # Pairs of IDs are ID references too.
+        arbitrary = summary.arbitraryIdRefStart
+        for i, operand in enumerate(operands):
+            if arbitrary == None and operand.getKind() == "PairIdRefIdRef" and operand.getQuantifier() == "*":
+                arbitrary = i
+
+        key = idRefs + optionalIdRefs
+        if key not in idRefPoolOffsets:
+            idRefPoolOffsets[key] = len(idRefPoolData)
+            idRefPoolData.extend(key)
+
+        idRefStart = idRefPoolOffsets[key] if len(key) > 0 else 0
+        counts = (len(optionalIdRefs) << 4) | len(idRefs)
+        maxLength = "ubyte.max" if summary.maximumSize >= 255 else str(summary.maximumSize)
+        arbitraryStart = "ubyte.max" if arbitrary == None else str(arbitrary+OPERAND_START)
+
+        tableRows.append((
+            start+instruction.getOpCode(),
+            f"SpirvExtInstInfo({summary.minimumSize}, {maxLength}, {idRefStart}, 0x{counts:02X}, {arbitraryStart})",
+            f"{extInstSet.getName()} {instruction.getOpName()}"
+        ))
+        nameRows.append((start+instruction.getOpCode(), instruction.getOpName()))
+
+assert tableSize < 65536, "Extended instruction table too large for ushort offsets!"
+
+idRefPool = TableEmitter("uint", "extInstIdRefOffsetPool", len(idRefPoolData), qualifiers="private immutable")
+for i in range(0, len(idRefPoolData), 16):
+    idRefPool.addRow(", ".join(map(str, idRefPoolData[i:i+16])))
+
+extInstTable = TableEmitter("SpirvExtInstInfo", "extInstTable", tableSize, qualifiers="private immutable")
+for index, value, comment in tableRows:
+    extInstTable.addRow(value, str(index), comment)
+
+extInstNames = TableEmitter("string", "extInstNames", tableSize, qualifiers="private immutable")
+for index, name in nameRows:
+    extInstNames.addRow(f"\"{name}\"", str(index))
+
+module.add(extInstSetNames)
+module.add(extInstRanges)
+module.add(idRefPool)
+module.add(extInstTable)
+module.add(extInstNames)
+
+# getExtInstSet
+getExtInstSetFunc = FuncEmitter("SpirvExtInstSet", "getExtInstSet", [FuncParameter("const(char)[]", "name")])
+getExtInstSetFunc.setComment("Gets the extended instruction set imported as [name] by OpExtInstImport.\n\nReturns:\n    The set, or [SpirvExtInstSet.unknown] if there is no grammar for it.")
+getExtInstSetFunc.add(BodyEmitter("""foreach(i; 1..extInstSetNames.length) {
+    if (extInstSetNames[i] == name)
+        return cast(SpirvExtInstSet)i;
+}
+return SpirvExtInstSet.unknown;"""))
+module.add(getExtInstSetFunc)
+
+# getExtInstSetName
+getExtInstSetNameFunc = FuncEmitter("string", "getExtInstSetName", [FuncParameter("SpirvExtInstSet", "set")]).setComment("Gets the name [set] is imported with by OpExtInstImport.")
+getExtInstSetNameFunc.add(BodyEmitter("return extInstSetNames[set];"))
+module.add(getExtInstSetNameFunc)
+
+# findExtInstInfo
+findExtInstInfoFunc = FuncEmitter("immutable(SpirvExtInstInfo)*", "findExtInstInfo", [FuncParameter("SpirvExtInstSet", "set"), FuncParameter("uint", "instruction")])
+findExtInstInfoFunc.setComment("Finds the reflection information for [instruction] of [set].\n\nReturns:\n    The information, or $(D null) if [set] has no such instruction.")
+findExtInstInfoFunc.add(BodyEmitter("""auto range = extInstRanges[set];
+if (instruction >= range.count || extInstNames[range.start+instruction] is null)
+    return null;
+
+return &extInstTable[range.start+instruction];"""))
+module.add(findExtInstInfoFunc)
+
+# getExtInstName
+getExtInstNameFunc = FuncEmitter("string", "getExtInstName", [FuncParameter("SpirvExtInstSet", "set"), FuncParameter("uint", "instruction")])
+getExtInstNameFunc.setComment("Gets the name of [instruction] of [set].\n\nReturns:\n    The name, or $(D null) if [set] has no such instruction.")
+getExtInstNameFunc.add(BodyEmitter("""auto range = extInstRanges[set];
+return instruction < range.count ? extInstNames[range.start+instruction] : null;"""))
+module.add(getExtInstNameFunc)
+
+# getExtInstIDRefIndices
+getExtInstIDRefIndicesFunc = FuncEmitter("immutable(uint)[]", "getExtInstIDRefIndices", [FuncParameter("SpirvExtInstSet", "set"), FuncParameter("uint", "instruction")])
+getExtInstIDRefIndicesFunc.setComment("Gets the indices of both required and optional reference IDs\nof [instruction], as operand indices of [Op.OpExtInst].")
+getExtInstIDRefIndicesFunc.add(BodyEmitter("""auto info = findExtInstInfo(set, instruction);
+if (!info)
+    return null;
+
+return extInstIdRefOffsetPool[info.idRefStart..info.idRefStart+info.getRequiredCount()+info.getOptionalCount()];"""))
+module.add(getExtInstIDRefIndicesFunc)
+
+# getExtInstArbitraryRefStart
+getExtInstArbitraryRefStartFunc = FuncEmitter("uint", "getExtInstArbitraryRefStart", [FuncParameter("SpirvExtInstSet", "set"), FuncParameter("uint", "instruction")])
+getExtInstArbitraryRefStartFunc.setComment("Gets the operand index of [Op.OpExtInst] at which the arbitrary\nid refs of [instruction] start, 0 if it has none.")
+getExtInstArbitraryRefStartFunc.add(BodyEmitter("""auto info = findExtInstInfo(set, instruction);
+return info && info.arbitraryStart != ubyte.max ? info.arbitraryStart : 0;"""))
+module.add(getExtInstArbitraryRefStartFunc)
+
+file.write(module.emit())
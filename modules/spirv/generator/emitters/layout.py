@@ -0,0 +1,369 @@
+from common import *
+from d_emit import *
+import io
+
+# Redefine them for completion
+scanner: SpirvGrammarScanner = scanner
+file: io.FileIO = file
+
+module = ModuleEmitter("layout")
+
+categories = {
+    "BitEnum": "bitEnum",
+    "ValueEnum": "valueEnum",
+    "Id": "id",
+    "Literal": "literal",
+    "Composite": "composite",
+}
+
+quantifiers = {
+    None: "one",
+    "?": "optional",
+    "*": "variadic",
+}
+
+# Operand kinds
+operandKinds = EnumEmitter("SpirvOperandKind", "ubyte")
+for kind in scanner.getOperandKinds():
+    operandKinds.add(kind.getKind())
+module.add(operandKinds)
+
+operandCategories = EnumEmitter("SpirvOperandCategory", "ubyte")
+for category in categories.values():
+    operandCategories.add(category)
+module.add(operandCategories)
+
+operandQuantifiers = EnumEmitter("SpirvOperandQuantifier", "ubyte")
+for quantifier in quantifiers.values():
+    operandQuantifiers.add(quantifier)
+module.add(operandQuantifiers)
+
+module.add(BodyEmitter("""/**
+    Word count of operands and instructions that have no upper bound.
+*/
+enum SpirvUnboundedWords = ushort.max;
+
+/**
+    Value returned by [walkOperands] when the operands are malformed.
+*/
+enum SPIRV_MALFORMED_OPERANDS = size_t.max;
+
+/**
+    A single operand in the layout of an opcode or operand parameter list.
+*/
+struct SpirvOperandSlot {
+    SpirvOperandKind kind;
+    SpirvOperandQuantifier quantifier;
+}
+
+/**
+    Layout information about an operand kind.
+*/
+struct SpirvOperandKindInfo {
+
+    /**
+        Category of the operand kind.
+    */
+    SpirvOperandCategory category;
+
+    /**
+        Fixed amount of words the operand takes up, 0 if
+        the size depends on the operand's contents.
+    */
+    ubyte words;
+
+    /**
+        Amount of composite base slots.
+    */
+    ubyte slotCount;
+
+    /**
+        Start of the composite base slots in the operand slot pool.
+    */
+    ushort slotStart;
+
+    /**
+        Start of the enumerants with parameters in the enumerant parameter table.
+    */
+    ushort enumerantStart;
+
+    /**
+        Amount of enumerants with parameters.
+    */
+    ushort enumerantCount;
+}
+
+/**
+    Parameters added by an enumerant.
+*/
+struct SpirvEnumerantParams {
+    uint value;
+    ushort slotStart;
+    ubyte slotCount;
+}
+
+/**
+    Layout information about an opcode.
+*/
+struct SpirvOpLayout {
+
+    /**
+        Start of the operand slots in the operand slot pool.
+    */
+    ushort slotStart;
+
+    /**
+        Amount of operand slots.
+    */
+    ubyte slotCount;
+
+    /**
+        Minimum amount of operand words.
+    */
+    ubyte minWords;
+
+    /**
+        Maximum amount of operand words, [SpirvUnboundedWords] if unbounded.
+    */
+    ushort maxWords;
+}
+
+/**
+    Callback used by [walkOperands], called with the kind, word offset
+    and word length of every operand.
+*/
+alias SpirvOperandVisitor = void delegate(SpirvOperandKind kind, size_t offset, size_t length) @nogc;"""))
+
+slotPool = list[str]()
+slotPoolOffsets = dict[tuple[str, ...], int]()
+
+# Adds a list of operands to the slot pool, identical
+# lists share the same slice of the pool.
+def addSlots(operands: list[SpirvOperandInfo]) -> tuple[int, int]:
+    key = tuple(f"SpirvOperandSlot(SpirvOperandKind.{operand.getKind()}, SpirvOperandQuantifier.{quantifiers[operand.getQuantifier()]})" for operand in operands)
+    if len(key) == 0:
+        return (0, 0)
+
+    if key not in slotPoolOffsets:
+        slotPoolOffsets[key] = len(slotPool)
+        slotPool.extend(key)
+    return (slotPoolOffsets[key], len(key))
+
+# Opcode layouts
+opLayouts = OpcodeTableEmitter("SpirvOpLayout", "opLayoutTable", "getOpLayout").setComment("Gets the operand layout of [Op]")
+for instruction in scanner.getInstructions():
+    start, count = addSlots(instruction.getOperands())
+    minWords, maxWords = scanner.getWordRange(instruction)
+    maxWords = "SpirvUnboundedWords" if maxWords >= UNBOUNDED_WORDS else str(maxWords)
+    opLayouts.addRow(instruction.getOpCode(), f"SpirvOpLayout({start}, {count}, {minWords}, {maxWords})", instruction.getOpName())
+
+# Operand kinds and the parameters of their enumerants.
+kindInfos = TableEmitter("SpirvOperandKindInfo", "operandKindInfos", qualifiers="private immutable")
+enumerantParams = TableEmitter("SpirvEnumerantParams", "enumerantParams", qualifiers="private immutable")
+for kind in scanner.getOperandKinds():
+    baseStart, baseCount = addSlots([SpirvOperandInfo({ "kind": base }) for base in kind.getBases()])
+
+    enumerantStart = len(enumerantParams.rows)
+    for enumerant in sorted(kind.getEnumerants(), key=lambda e: e.getValue()):
+        if len(enumerant.getParameters()) > 0:
+            start, count = addSlots(enumerant.getParameters())
+            enumerantParams.addRow(f"SpirvEnumerantParams({enumerant.getValue()}, {start}, {count})", comment=f"{kind.getKind()}.{enumerant.getName()}")
+
+    # Sizes of id and literal kinds, 0 where it depends on the operand's contents.
+    minWords, maxWords = scanner.getOperandWordRange(kind.getKind())
+    words = maxWords if kind.getCategory() in ("Id", "Literal") and minWords == maxWords else 0
+    enumerantCount = len(enumerantParams.rows)-enumerantStart
+    kindInfos.addRow(
+        f"SpirvOperandKindInfo(SpirvOperandCategory.{categories[kind.getCategory()]}, {words}, {baseCount}, {baseStart}, {enumerantStart}, {enumerantCount})",
+        f"SpirvOperandKind.{kind.getKind()}"
+    )
+
+assert len(slotPool) < 65536, "Operand slot pool too large for ushort offsets!"
+operandSlotPool = TableEmitter("SpirvOperandSlot", "operandSlotPool", qualifiers="private immutable")
+for slot in slotPool:
+    operandSlotPool.addRow(slot)
+
+module.add(operandSlotPool)
+module.add(kindInfos)
+module.add(enumerantParams)
+module.add(opLayouts)
+
+# getOperandSlots
+getOperandSlotsFunc = FuncEmitter("immutable(SpirvOperandSlot)[]", "getOperandSlots", [FuncParameter("Op", "code")]).setComment("Gets the operand slots of [Op]")
+getOperandSlotsFunc.add(BodyEmitter("""auto layout = getOpLayout(code);
+return operandSlotPool[layout.slotStart..layout.slotStart+layout.slotCount];"""))
+module.add(getOperandSlotsFunc)
+
+# getMinWords
+getMinWordsFunc = FuncEmitter("uint", "getMinWords", [FuncParameter("Op", "code")]).setComment("Gets the exact minimum number of operand words for [Op]")
+getMinWordsFunc.add(BodyEmitter("return getOpLayout(code).minWords;"))
+module.add(getMinWordsFunc)
+
+# getMaxWords
+getMaxWordsFunc = FuncEmitter("uint", "getMaxWords", [FuncParameter("Op", "code")]).setComment("Gets the exact maximum number of operand words for [Op],\n[SpirvUnboundedWords] if [Op] has no upper bound.")
+getMaxWordsFunc.add(BodyEmitter("return getOpLayout(code).maxWords;"))
+module.add(getMaxWordsFunc)
+
+# getOperandKindInfo
+getOperandKindInfoFunc = FuncEmitter("SpirvOperandKindInfo", "getOperandKindInfo", [FuncParameter("SpirvOperandKind", "kind")]).setComment("Gets layout information about an operand kind.")
+getOperandKindInfoFunc.add(BodyEmitter("return operandKindInfos[kind];"))
+module.add(getOperandKindInfoFunc)
+
+# getCompositeBases
+getCompositeBasesFunc = FuncEmitter("immutable(SpirvOperandSlot)[]", "getCompositeBases", [FuncParameter("SpirvOperandKind", "kind")]).setComment("Gets the operands that make up a composite operand kind.")
+getCompositeBasesFunc.add(BodyEmitter("""auto info = operandKindInfos[kind];
+return operandSlotPool[info.slotStart..info.slotStart+info.slotCount];"""))
+module.add(getCompositeBasesFunc)
+
+# getEnumerantParameters
+getEnumerantParametersFunc = FuncEmitter("immutable(SpirvOperandSlot)[]", "getEnumerantParameters", [FuncParameter("SpirvOperandKind", "kind"), FuncParameter("uint", "value")])
+getEnumerantParametersFunc.setComment("Gets the parameters that follow the enumerant [value] of [kind].\n\nFor bit enums [value] should be a single bit.")
+getEnumerantParametersFunc.add(BodyEmitter("""auto info = operandKindInfos[kind];
+auto params = enumerantParams[info.enumerantStart..info.enumerantStart+info.enumerantCount];
+
+// Enumerants are sorted by value.
+size_t lo = 0;
+size_t hi = params.length;
+while (lo < hi) {
+    size_t mid = (lo+hi)/2;
+    if (params[mid].value == value)
+        return operandSlotPool[params[mid].slotStart..params[mid].slotStart+params[mid].slotCount];
+
+    if (params[mid].value < value)
+        lo = mid+1;
+    else
+        hi = mid;
+}
+return null;"""))
+module.add(getEnumerantParametersFunc)
+
+# Operand walker
+module.add(BodyEmitter("""// Gets the amount of words in the null terminated string at the start of [words].
+private
+size_t getStringWords(const(uint)[] words) @nogc {
+    foreach(i, word; words) {
+
+        // SPIR-V strings are null padded to the word boundary,
+        // so the last word of a string always ends with a null.
+        if ((word >> 24) == 0)
+            return i+1;
+    }
+    return SPIRV_MALFORMED_OPERANDS;
+}
+
+// Walks a single operand, returns the offset after the operand.
+private
+size_t walkOperand(SpirvOperandKind kind, const(uint)[] words, size_t offset, bool isLast, scope SpirvOperandVisitor visitor) @nogc {
+    if (offset >= words.length)
+        return SPIRV_MALFORMED_OPERANDS;
+
+    auto info = operandKindInfos[kind];
+    final switch(info.category) {
+        case SpirvOperandCategory.id:
+        case SpirvOperandCategory.literal: {
+            size_t length = info.words;
+            if (kind == SpirvOperandKind.LiteralString)
+                length = getStringWords(words[offset..$]);
+            else if (kind == SpirvOperandKind.LiteralContextDependentNumber)
+                length = isLast ? words.length-offset : 1;
+
+            if (length == SPIRV_MALFORMED_OPERANDS || offset+length > words.length)
+                return SPIRV_MALFORMED_OPERANDS;
+
+            if (visitor)
+                visitor(kind, offset, length);
+
+            // The operands of the opcode named by OpSpecConstantOp follow it.
+            if (kind == SpirvOperandKind.LiteralSpecConstantOpInteger && isLast) {
+                auto slots = getOperandSlots(cast(Op)words[offset]);
+                while (slots.length > 0 && (slots[0].kind == SpirvOperandKind.IdResultType || slots[0].kind == SpirvOperandKind.IdResult))
+                    slots = slots[1..$];
+
+                return walkSlots(slots, words, offset+length, true, visitor);
+            }
+            return offset+length;
+        }
+
+        case SpirvOperandCategory.composite:
+            foreach(ref base; getCompositeBases(kind)) {
+                offset = walkOperand(base.kind, words, offset, false, visitor);
+                if (offset == SPIRV_MALFORMED_OPERANDS)
+                    return offset;
+            }
+            return offset;
+
+        case SpirvOperandCategory.valueEnum:
+            if (visitor)
+                visitor(kind, offset, 1);
+
+            return walkSlots(getEnumerantParameters(kind, words[offset]), words, offset+1, isLast, visitor);
+
+        case SpirvOperandCategory.bitEnum: {
+            if (visitor)
+                visitor(kind, offset, 1);
+
+            // Parameters follow in the order of the bits set.
+            uint mask = words[offset++];
+            foreach(bit; 0..32) {
+                if (mask & (1u << bit)) {
+                    offset = walkSlots(getEnumerantParameters(kind, 1u << bit), words, offset, false, visitor);
+                    if (offset == SPIRV_MALFORMED_OPERANDS)
+                        return offset;
+                }
+            }
+            return offset;
+        }
+    }
+}
+
+// Walks a list of operand slots, returns the offset after the last operand.
+private
+size_t walkSlots(immutable(SpirvOperandSlot)[] slots, const(uint)[] words, size_t offset, bool isLast, scope SpirvOperandVisitor visitor) @nogc {
+    foreach(i, ref slot; slots) {
+        bool last = isLast && i+1 == slots.length;
+
+        final switch(slot.quantifier) {
+            case SpirvOperandQuantifier.one:
+                offset = walkOperand(slot.kind, words, offset, last, visitor);
+                break;
+
+            case SpirvOperandQuantifier.optional:
+                if (offset < words.length)
+                    offset = walkOperand(slot.kind, words, offset, last, visitor);
+                break;
+
+            case SpirvOperandQuantifier.variadic:
+                while (offset < words.length)
+                    offset = walkOperand(slot.kind, words, offset, false, visitor);
+                break;
+        }
+
+        if (offset == SPIRV_MALFORMED_OPERANDS)
+            return offset;
+    }
+    return offset;
+}
+
+/**
+    Walks the operand words of an instruction with the opcode [code],
+    expanding composites and the parameters of enumerants.
+
+    [visitor] is called with the kind, offset and length of every
+    operand in the order they appear in [operands].
+
+    Returns:
+        The amount of words making up the operands,
+        or [SPIRV_MALFORMED_OPERANDS] if the operands are malformed.
+*/
+size_t walkOperands(Op code, const(uint)[] operands, scope SpirvOperandVisitor visitor = null) @nogc {
+    return walkSlots(getOperandSlots(code), operands, 0, true, visitor);
+}
+
+/**
+    Gets whether [operands] exactly matches the operand layout of [code].
+*/
+bool isWellFormed(Op code, const(uint)[] operands) @nogc {
+    return walkOperands(code, operands) == operands.length;
+}"""))
+
+file.write(module.emit())
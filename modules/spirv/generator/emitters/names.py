@@ -0,0 +1,146 @@
+from common import *
+from d_emit import *
+import io
+
+# Redefine them for completion
+scanner: SpirvGrammarScanner = scanner
+file: io.FileIO = file
+
+module = ModuleEmitter("names")
+module.add(BodyEmitter("""import spirv.layout;
+import spirv.operands;"""))
+
+module.add(BodyEmitter("""/**
+    Names of an opcode and its operands.
+
+    Names are stored as references in to a single string pool,
+    see [getOpName] and [getOperandName].
+*/
+struct SpirvOpNames {
+
+    /**
+        Reference to the name of the opcode.
+    */
+    uint name;
+
+    /**
+        Start of the operand name references in the operand name pool.
+    */
+    ushort operandStart;
+
+    /**
+        Amount of operand names, one for every operand slot.
+    */
+    ubyte operandCount;
+}"""))
+
+# Every name lives in a single pool, references pack the
+# offset in to the upper 24 bits and the length in to the lower 8.
+pool = list[str]()
+poolOffsets = dict[str, int]()
+poolSize = 0
+
+def addName(name: str) -> int:
+    global poolSize
+    assert len(name) < 256, f"Name {name} too long for a name reference!"
+    if name not in poolOffsets:
+        poolOffsets[name] = poolSize
+        pool.append(name)
+        poolSize += len(name)
+
+    assert poolOffsets[name] < (1 << 24), "Name pool too large for name references!"
+    return (poolOffsets[name] << 8) | len(name)
+
+# Operand names are quoted in the grammar.
+def getOperandName(operand: SpirvOperandInfo) -> str:
+    name = operand.getName()
+    if name == None:
+        return operand.getKind()
+    return name.strip("'").replace("\n", " ")
+
+# Opcode and operand names
+operandNamePoolData = list[int]()
+operandNamePoolOffsets = dict[tuple[int, ...], int]()
+opNames = OpcodeTableEmitter("SpirvOpNames", "opNamesTable", "getOpNames").setComment("Gets the names of [Op] and its operands")
+for instruction in scanner.getInstructions():
+    key = tuple(addName(getOperandName(operand)) for operand in instruction.getOperands())
+    if key not in operandNamePoolOffsets:
+        operandNamePoolOffsets[key] = len(operandNamePoolData)
+        operandNamePoolData.extend(key)
+
+    operandStart = operandNamePoolOffsets[key] if len(key) > 0 else 0
+    opNames.addRow(instruction.getOpCode(), f"SpirvOpNames({addName(instruction.getOpName())}, {operandStart}, {len(key)})", instruction.getOpName())
+
+assert len(operandNamePoolData) < 65536, "Operand name pool too large for ushort offsets!"
+
+# Operand kind names, and enumerant names in the same order
+# as the enumerants returned by getEnumerants.
+kindNames = TableEmitter("uint", "operandKindNames", qualifiers="private immutable")
+enumerantNameStarts = TableEmitter("ushort", "enumerantNameStarts", qualifiers="private immutable")
+enumerantNames = TableEmitter("uint", "enumerantNames", qualifiers="private immutable")
+for kind in scanner.getOperandKinds():
+    kindNames.addRow(addName(kind.getKind()), comment=f"SpirvOperandKind.{kind.getKind()}")
+    enumerantNameStarts.addRow(len(enumerantNames.rows), comment=f"SpirvOperandKind.{kind.getKind()}")
+    for enumerant in sorted(kind.getEnumerants(), key=lambda e: e.getValue()):
+        enumerantNames.addRow(addName(enumerant.getName()), comment=f"{kind.getKind()}.{enumerant.getName()}")
+
+assert len(enumerantNames.rows) < 65536, "Enumerant name table too large for ushort offsets!"
+
+operandNamePool = TableEmitter("uint", "operandNamePool", len(operandNamePoolData), qualifiers="private immutable")
+for i in range(0, len(operandNamePoolData), 8):
+    operandNamePool.addRow(", ".join(f"0x{name:08X}" for name in operandNamePoolData[i:i+8]))
+
+# The pool itself, split over lines of at most 96 characters.
+poolText = "".join(pool)
+poolLines = [poolText[i:i+96] for i in range(0, len(poolText), 96)]
+poolBody = "private immutable string namePool =\n"
+poolBody += " ~\n".join(f"    \"{line}\"" for line in poolLines) + ";"
+
+module.add(BodyEmitter(poolBody))
+module.add(operandNamePool)
+module.add(kindNames)
+module.add(enumerantNameStarts)
+module.add(enumerantNames)
+module.add(opNames)
+
+# getPoolName
+getPoolNameFunc = FuncEmitter("string", "getPoolName", [FuncParameter("uint", "name")])
+getPoolNameFunc.setComment("Gets a name from the name pool by its reference.\n\nReturns:\n    The name, or $(D null) for an empty reference.")
+getPoolNameFunc.add(BodyEmitter("""if ((name & 0xFF) == 0)
+    return null;
+
+return namePool[name >> 8..(name >> 8)+(name & 0xFF)];"""))
+module.add(getPoolNameFunc)
+
+# getOpName
+getOpNameFunc = FuncEmitter("string", "getOpName", [FuncParameter("Op", "code")]).setComment("Gets the name of [Op], $(D null) if [Op] is unknown.")
+getOpNameFunc.add(BodyEmitter("return getPoolName(getOpNames(code).name);"))
+module.add(getOpNameFunc)
+
+# getOperandName
+getOperandNameFunc = FuncEmitter("string", "getOperandName", [FuncParameter("Op", "code"), FuncParameter("size_t", "slot")])
+getOperandNameFunc.setComment("Gets the name of the operand in [slot] of the operand slots of [Op],\nsee [getOperandSlots].\n\nReturns:\n    The name, or $(D null) if [Op] has no such slot.")
+getOperandNameFunc.add(BodyEmitter("""auto names = getOpNames(code);
+if (slot >= names.operandCount)
+    return null;
+
+return getPoolName(operandNamePool[names.operandStart+slot]);"""))
+module.add(getOperandNameFunc)
+
+# getOperandKindName
+getOperandKindNameFunc = FuncEmitter("string", "getOperandKindName", [FuncParameter("SpirvOperandKind", "kind")]).setComment("Gets the name of [kind].")
+getOperandKindNameFunc.add(BodyEmitter("return getPoolName(operandKindNames[kind]);"))
+module.add(getOperandKindNameFunc)
+
+# getEnumerantName
+getEnumerantNameFunc = FuncEmitter("string", "getEnumerantName", [FuncParameter("SpirvOperandKind", "kind"), FuncParameter("uint", "value")])
+getEnumerantNameFunc.setComment("Gets the name of the enumerant [value] of [kind].\n\nFor bit enums [value] should be a single bit.\n\nReturns:\n    The name, or $(D null) if [kind] has no such enumerant.")
+getEnumerantNameFunc.add(BodyEmitter("""auto enumerant = findEnumerant(kind, value);
+if (!enumerant)
+    return null;
+
+// Names are stored in the same order as getEnumerants.
+return getPoolName(enumerantNames[enumerantNameStarts[kind]+(enumerant-getEnumerants(kind).ptr)]);"""))
+module.add(getEnumerantNameFunc)
+
+file.write(module.emit())
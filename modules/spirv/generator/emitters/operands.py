@@ -0,0 +1,222 @@
+from common import *
+from d_emit import *
+import io
+
+# Redefine them for completion
+scanner: SpirvGrammarScanner = scanner
+file: io.FileIO = file
+
+module = ModuleEmitter("operands")
+module.add(BodyEmitter("import spirv.layout;"))
+
+quantifiers = {
+    None: "one",
+    "?": "optional",
+    "*": "variadic",
+}
+
+# Extensions
+extensions = EnumEmitter("SpirvExtension", "ubyte")
+for extension in scanner.getExtensions():
+    extensions.add(extension)
+module.add(extensions)
+
+module.add(BodyEmitter("""/**
+    Decoding information about a single enumerant of an operand kind.
+*/
+struct SpirvEnumerantInfo {
+@nogc nothrow:
+
+    /**
+        Value of the enumerant, a single bit for bit enums.
+    */
+    uint value;
+
+    /**
+        Start of the parameters in the parameter pool.
+    */
+    ushort paramStart;
+
+    /**
+        Start of the required capabilities in the capability pool.
+    */
+    ushort capabilityStart;
+
+    /**
+        Start of the required extensions in the extension pool.
+    */
+    ushort extensionStart;
+
+    /**
+        Amount of parameters following the enumerant.
+    */
+    ubyte paramCount;
+
+    /**
+        Amount of capabilities, any of which enables the enumerant.
+    */
+    ubyte capabilityCount;
+
+    /**
+        Amount of extensions, any of which enables the enumerant.
+    */
+    ubyte extensionCount;
+
+    /**
+        Gets the operands following the enumerant.
+    */
+    immutable(SpirvOperandSlot)[] getParameters() const {
+        return enumerantParamPool[paramStart..paramStart+paramCount];
+    }
+
+    /**
+        Gets the capabilities enabling the enumerant.
+    */
+    immutable(Capability)[] getCapabilities() const {
+        return capabilityPool[capabilityStart..capabilityStart+capabilityCount];
+    }
+
+    /**
+        Gets the extensions enabling the enumerant.
+    */
+    immutable(SpirvExtension)[] getExtensions() const {
+        return extensionPool[extensionStart..extensionStart+extensionCount];
+    }
+}
+
+/**
+    Callback used by [foreachEnumerant].
+*/
+alias SpirvEnumerantVisitor = void delegate(ref immutable(SpirvEnumerantInfo) enumerant) @nogc;
+
+// Range of the enumerants of an operand kind in the enumerant table.
+private
+struct SpirvEnumerantRange {
+    ushort start;
+    ushort count;
+}"""))
+
+# Adds a list of values to a pool, identical lists
+# share the same slice of the pool.
+def addToPool(pool: list[str], offsets: dict[tuple[str, ...], int], values: list[str]) -> tuple[int, int]:
+    key = tuple(values)
+    if len(key) == 0:
+        return (0, 0)
+
+    if key not in offsets:
+        offsets[key] = len(pool)
+        pool.extend(key)
+    return (offsets[key], len(key))
+
+paramPool = list[str]()
+paramPoolOffsets = dict[tuple[str, ...], int]()
+capabilityPool = list[str]()
+capabilityPoolOffsets = dict[tuple[str, ...], int]()
+extensionPool = list[str]()
+extensionPoolOffsets = dict[tuple[str, ...], int]()
+
+enumerantTable = TableEmitter("SpirvEnumerantInfo", "enumerantTable", qualifiers="private immutable")
+enumerantRanges = TableEmitter("SpirvEnumerantRange", "enumerantRanges", qualifiers="private immutable")
+for kind in scanner.getOperandKinds():
+    start = len(enumerantTable.rows)
+
+    # Enumerants are sorted by value for binary searching.
+    for enumerant in sorted(kind.getEnumerants(), key=lambda e: e.getValue()):
+        paramStart, paramCount = addToPool(paramPool, paramPoolOffsets, [
+            f"SpirvOperandSlot(SpirvOperandKind.{param.getKind()}, SpirvOperandQuantifier.{quantifiers[param.getQuantifier()]})" for param in enumerant.getParameters()
+        ])
+        capabilityStart, capabilityCount = addToPool(capabilityPool, capabilityPoolOffsets, [
+            f"Capability.{capability}" for capability in enumerant.getCapabilities()
+        ])
+        extensionStart, extensionCount = addToPool(extensionPool, extensionPoolOffsets, [
+            f"SpirvExtension.{extension}" for extension in enumerant.getExtensions()
+        ])
+
+        enumerantTable.addRow(
+            f"SpirvEnumerantInfo({enumerant.getValue()}, {paramStart}, {capabilityStart}, {extensionStart}, {paramCount}, {capabilityCount}, {extensionCount})",
+            comment=f"{kind.getKind()}.{enumerant.getName()}"
+        )
+
+    enumerantRanges.addRow(f"SpirvEnumerantRange({start}, {len(enumerantTable.rows)-start})", f"SpirvOperandKind.{kind.getKind()}")
+
+assert len(enumerantTable.rows) < 65536, "Enumerant table too large for ushort offsets!"
+
+enumerantParamPool = TableEmitter("SpirvOperandSlot", "enumerantParamPool", len(paramPool), qualifiers="private immutable")
+for param in paramPool:
+    enumerantParamPool.addRow(param)
+
+capabilityPoolTable = TableEmitter("Capability", "capabilityPool", len(capabilityPool), qualifiers="private immutable")
+for i in range(0, len(capabilityPool), 4):
+    capabilityPoolTable.addRow(", ".join(capabilityPool[i:i+4]))
+
+extensionPoolTable = TableEmitter("SpirvExtension", "extensionPool", len(extensionPool), qualifiers="private immutable")
+for extension in extensionPool:
+    extensionPoolTable.addRow(extension)
+
+extensionNames = TableEmitter("string", "extensionNames", qualifiers="private immutable")
+for extension in scanner.getExtensions():
+    extensionNames.addRow(f"\"{extension}\"", f"SpirvExtension.{extension}")
+
+module.add(enumerantParamPool)
+module.add(capabilityPoolTable)
+module.add(extensionPoolTable)
+module.add(extensionNames)
+module.add(enumerantTable)
+module.add(enumerantRanges)
+
+# getExtensionName
+getExtensionNameFunc = FuncEmitter("string", "getExtensionName", [FuncParameter("SpirvExtension", "extension")]).setComment("Gets the name of [SpirvExtension] as used by OpExtension.")
+getExtensionNameFunc.add(BodyEmitter("return extensionNames[extension];"))
+module.add(getExtensionNameFunc)
+
+# getEnumerants
+getEnumerantsFunc = FuncEmitter("immutable(SpirvEnumerantInfo)[]", "getEnumerants", [FuncParameter("SpirvOperandKind", "kind")]).setComment("Gets all enumerants of [kind], sorted by value.")
+getEnumerantsFunc.add(BodyEmitter("""auto range = enumerantRanges[kind];
+return enumerantTable[range.start..range.start+range.count];"""))
+module.add(getEnumerantsFunc)
+
+# findEnumerant
+findEnumerantFunc = FuncEmitter("immutable(SpirvEnumerantInfo)*", "findEnumerant", [FuncParameter("SpirvOperandKind", "kind"), FuncParameter("uint", "value")])
+findEnumerantFunc.setComment("Finds the enumerant [value] of [kind].\n\nFor bit enums [value] should be a single bit.\n\nReturns:\n    The enumerant, or $(D null) if [kind] has no such enumerant.")
+findEnumerantFunc.add(BodyEmitter("""auto enumerants = getEnumerants(kind);
+
+size_t lo = 0;
+size_t hi = enumerants.length;
+while (lo < hi) {
+    size_t mid = (lo+hi)/2;
+    if (enumerants[mid].value == value)
+        return &enumerants[mid];
+
+    if (enumerants[mid].value < value)
+        lo = mid+1;
+    else
+        hi = mid;
+}
+return null;"""))
+module.add(findEnumerantFunc)
+
+# foreachEnumerant
+foreachEnumerantFunc = FuncEmitter("bool", "foreachEnumerant", [FuncParameter("SpirvOperandKind", "kind"), FuncParameter("uint", "value"), FuncParameter("scope SpirvEnumerantVisitor", "visitor")])
+foreachEnumerantFunc.setComment("Decodes an operand word of [kind], calling [visitor] for the enumerant\nit names, or for bit enums for every bit which is set in [value].\n\nReturns:\n    $(D true) if every enumerant in [value] is known,\n    $(D false) otherwise.")
+foreachEnumerantFunc.add(BodyEmitter("""if (getOperandKindInfo(kind).category != SpirvOperandCategory.bitEnum || value == 0) {
+    auto enumerant = findEnumerant(kind, value);
+    if (!enumerant)
+        return false;
+
+    visitor(*enumerant);
+    return true;
+}
+
+bool known = true;
+foreach(bit; 0..32) {
+    if (value & (1u << bit)) {
+        if (auto enumerant = findEnumerant(kind, 1u << bit))
+            visitor(*enumerant);
+        else
+            known = false;
+    }
+}
+return known;"""))
+module.add(foreachEnumerantFunc)
+
+file.write(module.emit())
@@ -7,105 +7,201 @@ scanner: SpirvGrammarScanner = scanner
 file: io.FileIO = file
 
 module = ModuleEmitter("reflection")
+module.add(BodyEmitter("import spirv.variant : SpirvVariantKind;"))
 module.add(BodyEmitter("import nulib.collections;"))
 module.add(BodyEmitter("import numem;"))
 
 # Spirv OpClass
-spirvClasses = EnumEmitter("OpClass")
+spirvClasses = EnumEmitter("OpClass", "ubyte")
 for klass in scanner.getClasses():
     spirvClasses.add(klass.getDName())
 spirvClasses.add("unknown")
 module.add(spirvClasses)
 
-# Helpers
-returnTrue = BodyEmitter("return true;")
-returnFalse = BodyEmitter("return false;")
-returnClassUnk = BodyEmitter("return OpClass.unknown;")
-returnEmptyArr = BodyEmitter("return vector!(uint).init;")
-returnZero = BodyEmitter("return 0;")
-
-getClassFunc = FuncEmitter("OpClass", "getClass", [FuncParameter("Op", "code")]).setComment("Gets whether [Op] is of the specified opcode class.")
-getClassSwitch = SwitchEmitter("code", "Op").setDefault(returnClassUnk)
-getClassFunc.add(getClassSwitch)
-classBodies = dict[str, BodyEmitter]()
+# Spirv opcode flags
+spirvOpFlags = EnumEmitter("SpirvOpFlags", "ubyte")
+spirvOpFlags.addKV("none", "0x00")
+spirvOpFlags.addKV("hasResult", "0x01")
+spirvOpFlags.addKV("hasResultType", "0x02")
+module.add(spirvOpFlags)
+
+# Opcode info
+module.add(BodyEmitter("""/**
+    Packed reflection information about a single opcode.
+
+    Every per-opcode query in this module is answered by
+    a single lookup of this structure.
+*/
+struct SpirvOpInfo {
+@nogc nothrow:
+
+    /**
+        Class of the opcode.
+    */
+    OpClass opClass = OpClass.unknown;
+
+    /**
+        Flags of the opcode, see [SpirvOpFlags].
+    */
+    ubyte flags;
+
+    /**
+        Minimum number of operands.
+    */
+    ubyte minLength;
+
+    /**
+        Maximum number of operands, [ubyte.max] if unbounded.
+    */
+    ubyte maxLength;
+
+    /**
+        Start of the ID reference offsets in the ID reference offset pool.
+    */
+    ushort idRefStart;
+
+    /**
+        Required (low nibble) and optional (high nibble) ID reference counts.
+    */
+    ubyte idRefCounts;
+
+    /**
+        Operand index at which arbitrary ID references start,
+        [ubyte.max] if the opcode has none.
+    */
+    ubyte arbitraryStart = ubyte.max;
+
+    /**
+        Number of required ID references.
+    */
+    uint getRequiredCount() const {
+        return idRefCounts & 0x0F;
+    }
+
+    /**
+        Number of optional ID references.
+    */
+    uint getOptionalCount() const {
+        return idRefCounts >> 4;
+    }
+}"""))
+
+opInfoTable = OpcodeTableEmitter("SpirvOpInfo", "opInfoTable", "getOpInfo").setComment("Gets the packed reflection information for [Op]")
+variantKindTable = OpcodeTableEmitter("SpirvVariantKind", "variantKindTable", "getVariantKind").setComment("Gets the kind of variant created for [Op],\n[SpirvVariantKind.basic] if there is no more specific one.")
+idRefPoolData = list[int]()
+idRefPoolOffsets = dict[tuple[int, ...], int]()
+classNames = dict[str, str]()
 
 for klass in scanner.getClasses():
-    classBodies[klass.getTag()] = BodyEmitter(f"return OpClass.{klass.getDName()};")
-    getClassSwitch.addCaseBody(classBodies[klass.getTag()])
+    classNames[klass.getTag()] = klass.getDName()
 
     # isTypeDeclaration
     isXClassFunc = FuncEmitter("bool", f"is{klass.getTagPascalCase()}", [FuncParameter("Op", "code")]).setComment(f"Gets whether [Op] is of the {klass.getDescription()} class.")
     isXClassFunc.add(BodyEmitter(f"return getClass(code) == OpClass.{klass.getDName()};"))
     module.add(isXClassFunc)
-    
+
+for instruction in scanner.getInstructions():
+    summary = instruction.getSummary()
+    opclass = classNames.get(instruction.getClass(), "unknown")
+
+    flags = list[str]()
+    if summary.hasResult():
+        flags.append("SpirvOpFlags.hasResult")
+    if summary.hasResultType():
+        flags.append("SpirvOpFlags.hasResultType")
+    if len(flags) == 0:
+        flags.append("SpirvOpFlags.none")
+
+    maxLength = "ubyte.max" if summary.maximumSize >= 255 else str(summary.maximumSize)
+
+    # Identical offset lists share the same slice of the pool.
+    key = summary.idRefIndices + summary.optionalIdRefIndices
+    if key not in idRefPoolOffsets:
+        idRefPoolOffsets[key] = len(idRefPoolData)
+        idRefPoolData.extend(key)
+
+    # Both counts are packed in to a nibble each.
+    assert len(summary.idRefIndices) < 16 and len(summary.optionalIdRefIndices) < 16, f"Too many ID references in {instruction.getOpName()}!"
+
+    start = idRefPoolOffsets[key] if len(key) > 0 else 0
+    counts = (len(summary.optionalIdRefIndices) << 4) | len(summary.idRefIndices)
+    arbitrary = "ubyte.max" if not summary.hasArbitraryIdRefs() else str(summary.arbitraryIdRefStart)
+
+    opInfoTable.addRow(
+        instruction.getOpCode(),
+        f"SpirvOpInfo(OpClass.{opclass}, {' | '.join(flags)}, {summary.minimumSize}, {maxLength}, {start}, 0x{counts:02X}, {arbitrary})",
+        instruction.getOpName()
+    )
+
+    # Only opcodes with a specific variant are stored,
+    # anything else looks up as the basic variant.
+    variantKind = None
+    if instruction.getOpName() == "OpEntryPoint":
+        variantKind = "entryPoint"
+    elif instruction.getOpName() == "OpVariable":
+        variantKind = "variable"
+    elif opclass == "typeDeclaration":
+        variantKind = "type"
+    elif opclass == "annotation":
+        variantKind = "decoration"
+
+    if variantKind != None:
+        variantKindTable.addRow(instruction.getOpCode(), f"SpirvVariantKind.{variantKind}", instruction.getOpName())
+
+# ID reference offset pool
+idRefPool = TableEmitter("uint", "idRefOffsetPool", len(idRefPoolData), qualifiers="private immutable")
+for i in range(0, len(idRefPoolData), 16):
+    idRefPool.addRow(", ".join(map(str, idRefPoolData[i:i+16])))
+module.add(idRefPool)
+
+module.add(opInfoTable)
+module.add(variantKindTable)
+
+# getClass
+getClassFunc = FuncEmitter("OpClass", "getClass", [FuncParameter("Op", "code")]).setComment("Gets whether [Op] is of the specified opcode class.")
+getClassFunc.add(BodyEmitter("return getOpInfo(code).opClass;"))
+
 # hasResult
 hasResultFunc = FuncEmitter("bool", "hasResult", [FuncParameter("Op", "code")]).setComment("Gets whether [Op] returns a result.")
-hasResultSwitch = SwitchEmitter("code", "Op").setDefault(returnFalse)
-hasResultFunc.add(hasResultSwitch)
+hasResultFunc.add(BodyEmitter("return (getOpInfo(code).flags & SpirvOpFlags.hasResult) != 0;"))
 
 # hasResultType
 hasResultTypeFunc = FuncEmitter("bool", "hasResultType", [FuncParameter("Op", "code")]).setComment("Gets whether [Op] returns a result type.")
-hasResultTypeSwitch = SwitchEmitter("code", "Op").setDefault(returnFalse)
-hasResultTypeFunc.add(hasResultTypeSwitch)
+hasResultTypeFunc.add(BodyEmitter("return (getOpInfo(code).flags & SpirvOpFlags.hasResultType) != 0;"))
 
 # getMinLength
 getMinLengthFunc = FuncEmitter("uint", "getMinLength", [FuncParameter("Op", "code")]).setComment("Gets the minimum number of operands for [Op]")
-getMinLengthFuncSwitch = SwitchEmitter("code", "Op").setDefault(returnZero)
-getMinLengthFunc.add(getMinLengthFuncSwitch)
+getMinLengthFunc.add(BodyEmitter("return getOpInfo(code).minLength;"))
 
 # getMaxLength
 getMaxLengthFunc = FuncEmitter("uint", "getMaxLength", [FuncParameter("Op", "code")]).setComment("Gets the maximum number of operands for [Op]")
-getMaxLengthFuncSwitch = SwitchEmitter("code", "Op").setDefault(returnZero)
-getMaxLengthFunc.add(getMaxLengthFuncSwitch)
+getMaxLengthFunc.add(BodyEmitter("""auto info = getOpInfo(code);
+return info.maxLength == ubyte.max ? 65535 : info.maxLength;"""))
 
 # getIDRefIndices
-getIDRefIndicesFunc = FuncEmitter("vector!uint", "getIDRefIndices", [FuncParameter("Op", "code")]).setComment("Gets the indices for reference IDs for [Op]")
-getIDRefIndicesFuncSwitch = SwitchEmitter("code", "Op").setDefault(returnEmptyArr)
-getIDRefIndicesFunc.add(getIDRefIndicesFuncSwitch)
+getIDRefIndicesFunc = FuncEmitter("immutable(uint)[]", "getIDRefIndices", [FuncParameter("Op", "code")]).setComment("Gets the indices for required reference IDs for [Op]")
+getIDRefIndicesFunc.add(BodyEmitter("""auto info = getOpInfo(code);
+return idRefOffsetPool[info.idRefStart..info.idRefStart+info.getRequiredCount()];"""))
 
 # getOptionalIDRefIndices
-getOptionalIDRefIndicesFunc = FuncEmitter("vector!uint", "getOptionalIDRefIndices", [FuncParameter("Op", "code")]).setComment("Gets the indices for reference IDs for [Op]")
-getOptionalIDRefIndicesFuncSwitch = SwitchEmitter("code", "Op").setDefault(returnEmptyArr)
-getOptionalIDRefIndicesFunc.add(getOptionalIDRefIndicesFuncSwitch)
+getOptionalIDRefIndicesFunc = FuncEmitter("immutable(uint)[]", "getOptionalIDRefIndices", [FuncParameter("Op", "code")]).setComment("Gets the indices for optional reference IDs for [Op]")
+getOptionalIDRefIndicesFunc.add(BodyEmitter("""auto info = getOpInfo(code);
+size_t start = info.idRefStart+info.getRequiredCount();
+return idRefOffsetPool[start..start+info.getOptionalCount()];"""))
+
+# getAllIDRefIndices
+getAllIDRefIndicesFunc = FuncEmitter("immutable(uint)[]", "getAllIDRefIndices", [FuncParameter("Op", "code")]).setComment("Gets the indices for both required and optional reference IDs for [Op]")
+getAllIDRefIndicesFunc.add(BodyEmitter("""auto info = getOpInfo(code);
+return idRefOffsetPool[info.idRefStart..info.idRefStart+info.getRequiredCount()+info.getOptionalCount()];"""))
 
 # getHasArbitraryRefIndices
 getHasArbitraryRefIndicesFunc = FuncEmitter("bool", "getHasArbitraryRefIndices", [FuncParameter("Op", "code")]).setComment("Gets whether [Op] ends with a list of arbitrary id refs.")
-getHasArbitraryRefIndicesSwitch = SwitchEmitter("code", "Op").setDefault(returnFalse)
-getHasArbitraryRefIndicesFunc.add(getHasArbitraryRefIndicesSwitch)
+getHasArbitraryRefIndicesFunc.add(BodyEmitter("return getOpInfo(code).arbitraryStart != ubyte.max;"))
 
-
-for instruction in scanner.getInstructions():
-    opclass = instruction.getClass()
-    if opclass in classBodies:
-        getClassSwitch.addCase(instruction.getOpName(), classBodies[opclass])
-    
-    if instruction.hasResult():
-        hasResultSwitch.addCase(instruction.getOpName(), returnTrue)
-
-    if instruction.hasResultType():
-        hasResultTypeSwitch.addCase(instruction.getOpName(), returnTrue)
-    
-    getMinLengthFuncSwitch.addCase(instruction.getOpName(), BodyEmitter(f"return {instruction.getMinimumSize()};"))
-    getMaxLengthFuncSwitch.addCase(instruction.getOpName(), BodyEmitter(f"return {instruction.getMaximumSize()};"))
-
-    idrefs = list[int]()
-    opt_idrefs = list[int]()
-    for i, operand in enumerate(instruction.getOperands()):
-        if (operand.getKind() == "IdRef"):
-            if (operand.getQuantifier() == None):
-                idrefs.append(i)
-            elif (operand.getQuantifier() == "?"):
-                opt_idrefs.append(i)
-            elif (operand.getQuantifier() == "*"):
-                getHasArbitraryRefIndicesSwitch.addCase(instruction.getOpName(), returnTrue)
-    if len(idrefs) > 0:
-        refstr = ", ".join(map(str, idrefs))
-        code = f"uint[{len(idrefs)}] tmp = [{refstr}];\nreturn vector!uint(tmp);"
-        getIDRefIndicesFuncSwitch.addCase(instruction.getOpName(), BodyEmitter(code))
-    if len(opt_idrefs) > 0:
-        refstr = ", ".join(map(str, opt_idrefs))
-        code = f"uint[{len(opt_idrefs)}] tmp = [{refstr}];\nreturn vector!uint(tmp);"
-        getOptionalIDRefIndicesFuncSwitch.addCase(instruction.getOpName(), BodyEmitter(code))
+# getArbitraryRefStart
+getArbitraryRefStartFunc = FuncEmitter("uint", "getArbitraryRefStart", [FuncParameter("Op", "code")]).setComment("Gets the operand index at which the arbitrary id refs of [Op] start.")
+getArbitraryRefStartFunc.add(BodyEmitter("""auto info = getOpInfo(code);
+return info.arbitraryStart == ubyte.max ? 0 : info.arbitraryStart;"""))
 
 module.add(getClassFunc)
 module.add(hasResultFunc)
@@ -114,6 +210,8 @@ module.add(getMinLengthFunc)
 module.add(getMaxLengthFunc)
 module.add(getIDRefIndicesFunc)
 module.add(getOptionalIDRefIndicesFunc)
+module.add(getAllIDRefIndicesFunc)
 module.add(getHasArbitraryRefIndicesFunc)
+module.add(getArbitraryRefStartFunc)
 
-file.write(module.emit())
\ No newline at end of file
+file.write(module.emit())
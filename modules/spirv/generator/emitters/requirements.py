@@ -0,0 +1,395 @@
+from common import *
+from d_emit import *
+import io
+
+# Redefine them for completion
+scanner: SpirvGrammarScanner = scanner
+file: io.FileIO = file
+
+module = ModuleEmitter("requirements")
+module.add(BodyEmitter("""import spirv.layout;
+import spirv.operands;"""))
+
+# Capabilities are assigned bits in order of their value.
+capabilities = sorted(scanner.getOperandKind("Capability").getEnumerants(), key=lambda e: e.getValue())
+capabilityBits = dict[str, int]()
+for bit, capability in enumerate(capabilities):
+    capabilityBits[capability.getName()] = bit
+
+extensionBits = dict[str, int]()
+for bit, extension in enumerate(scanner.getExtensions()):
+    extensionBits[extension] = bit
+
+capabilityWords = (len(capabilities)+31) // 32
+extensionWords = (len(extensionBits)+31) // 32
+
+module.add(BodyEmitter(f"""/**
+    Version word used for requirements which are not part of
+    any core SPIR-V version and need an extension instead.
+*/
+enum SpirvVersionNone = 0;
+
+/**
+    A set of bits, used to store sets of capabilities and extensions.
+*/
+struct SpirvBitSet(size_t words) {{
+@nogc nothrow:
+
+    /**
+        The bits of the set.
+    */
+    uint[words] bits;
+
+    /**
+        Whether the bit at [index] is set.
+    */
+    bool has(size_t index) const {{
+        return index < words*32 && (bits[index >> 5] & (1u << (index & 31))) != 0;
+    }}
+
+    /**
+        Sets the bit at [index].
+    */
+    void set(size_t index) {{
+        if (index < words*32)
+            bits[index >> 5] |= 1u << (index & 31);
+    }}
+
+    /**
+        Whether no bits are set.
+    */
+    bool empty() const {{
+        foreach(word; bits) {{
+            if (word != 0)
+                return false;
+        }}
+        return true;
+    }}
+
+    /**
+        Whether any bit is set in both this and [other].
+    */
+    bool intersects(ref const(SpirvBitSet) other) const {{
+        foreach(i; 0..words) {{
+            if ((bits[i] & other.bits[i]) != 0)
+                return true;
+        }}
+        return false;
+    }}
+
+    /**
+        Whether every bit set in [other] is also set in this set.
+    */
+    bool contains(ref const(SpirvBitSet) other) const {{
+        foreach(i; 0..words) {{
+            if ((bits[i] & other.bits[i]) != other.bits[i])
+                return false;
+        }}
+        return true;
+    }}
+
+    /**
+        Adds every bit of [other] to this set.
+    */
+    void opOpAssign(string op: "|")(auto ref const(SpirvBitSet) other) {{
+        foreach(i; 0..words)
+            bits[i] |= other.bits[i];
+    }}
+}}
+
+/**
+    A set of capabilities, see [getCapabilityBit].
+*/
+alias SpirvCapabilitySet = SpirvBitSet!{capabilityWords};
+
+/**
+    A set of extensions, indexed by [SpirvExtension].
+*/
+alias SpirvExtensionSet = SpirvBitSet!{extensionWords};
+
+/**
+    The capabilities, extensions and SPIR-V version an opcode
+    or enumerant needs.
+
+    Any one of the capabilities in the capability set is needed. The
+    opcode or enumerant is part of the core from [minVersion] on, any
+    one of the extensions in the extension set enables it before that.
+*/
+struct SpirvOpRequirements {{
+@nogc nothrow:
+
+    /**
+        Index of the capability set in the capability set pool.
+    */
+    ushort capabilitySet;
+
+    /**
+        Index of the extension set in the extension set pool.
+    */
+    ushort extensionSet;
+
+    /**
+        Minimum SPIR-V version word, [SpirvVersionNone] if the
+        opcode is only available through extensions.
+    */
+    uint minVersion;
+
+    /**
+        Gets the set of capabilities, any of which is needed.
+    */
+    ref immutable(SpirvCapabilitySet) getCapabilities() const {{
+        return capabilitySetPool[capabilitySet];
+    }}
+
+    /**
+        Gets the set of extensions, any of which enables the
+        opcode or enumerant before [minVersion].
+    */
+    ref immutable(SpirvExtensionSet) getExtensions() const {{
+        return extensionSetPool[extensionSet];
+    }}
+
+    /**
+        Whether a device supporting [capabilities] and [extensions]
+        can use the opcode or enumerant with SPIR-V [version].
+    */
+    bool isSatisfiedBy(ref const(SpirvCapabilitySet) capabilities, ref const(SpirvExtensionSet) extensions, uint version) const {{
+        auto neededCapabilities = &this.getCapabilities();
+        if (!neededCapabilities.empty() && !neededCapabilities.intersects(capabilities))
+            return false;
+
+        bool inCore = minVersion != SpirvVersionNone && version >= minVersion;
+        auto neededExtensions = &this.getExtensions();
+        if (neededExtensions.empty())
+            return minVersion == SpirvVersionNone || inCore;
+
+        return inCore || neededExtensions.intersects(extensions);
+    }}
+}}"""))
+
+# Adds a bit set to a pool, identical sets share the same index.
+def addBitSet(pool: list[str], indices: dict[tuple[int, ...], int], bits: list[int], words: int) -> int:
+    key = tuple(sorted(bits))
+    if key not in indices:
+        values = [0] * words
+        for bit in key:
+            values[bit >> 5] |= 1 << (bit & 31)
+
+        indices[key] = len(pool)
+        pool.append(", ".join(f"0x{value:08X}" for value in values))
+    return indices[key]
+
+# Every distinct set of requirements is stored once, opcodes
+# and enumerants refer to them by index.
+def addRequirements(capabilities: list[str], extensions: list[str], version: str) -> int:
+    capabilitySet = addBitSet(capabilitySets, capabilitySetIndices, [capabilityBits[c] for c in capabilities], capabilityWords)
+    extensionSet = addBitSet(extensionSets, extensionSetIndices, [extensionBits[e] for e in extensions], extensionWords)
+    key = (capabilitySet, extensionSet, toVersionWord(version))
+    if key not in requirementIndices:
+        requirementIndices[key] = len(requirements)
+        requirements.append(key)
+    return requirementIndices[key]
+
+capabilitySets = list[str]()
+capabilitySetIndices = dict[tuple[int, ...], int]()
+extensionSets = list[str]()
+extensionSetIndices = dict[tuple[int, ...], int]()
+
+# The empty sets are always first.
+addBitSet(capabilitySets, capabilitySetIndices, [], capabilityWords)
+addBitSet(extensionSets, extensionSetIndices, [], extensionWords)
+
+requirements = list[tuple[int, int, int]]()
+requirementIndices = dict[tuple[int, int, int], int]()
+
+opRequirements = OpcodeTableEmitter("ushort", "opRequirementsTable", "getOpRequirementsIndex").setComment("Gets the index of the requirements of [Op] in the requirements pool.")
+for instruction in scanner.getInstructions():
+    index = addRequirements(instruction.getCapabilities(), instruction.getExtensions(), instruction.getVersion())
+    opRequirements.addRow(instruction.getOpCode(), index, instruction.getOpName())
+
+# Enumerants are stored in the order of the enumerant table of spirv.operands.
+enumerantRequirements = TableEmitter("ushort", "enumerantRequirementsTable", qualifiers="private immutable")
+enumerantRequirementStarts = TableEmitter("ushort", "enumerantRequirementStarts", qualifiers="private immutable")
+for kind in scanner.getOperandKinds():
+    enumerantRequirementStarts.addRow(str(len(enumerantRequirements.rows)), f"SpirvOperandKind.{kind.getKind()}")
+    for enumerant in sorted(kind.getEnumerants(), key=lambda e: e.getValue()):
+        index = addRequirements(enumerant.getCapabilities(), enumerant.getExtensions(), enumerant.getVersion())
+        enumerantRequirements.addRow(str(index), comment=f"{kind.getKind()}.{enumerant.getName()}")
+
+assert len(requirements) < 65536, "Too many requirements for ushort indices!"
+requirementWords = (len(requirements)+31) // 32
+
+requirementPool = TableEmitter("SpirvOpRequirements", "requirementPool", qualifiers="private immutable")
+for capabilitySet, extensionSet, version in requirements:
+    requirementPool.addRow(f"SpirvOpRequirements({capabilitySet}, {extensionSet}, 0x{version:08X})")
+
+capabilityBitTable = TableEmitter("Capability", "capabilityBitTable", qualifiers="private immutable")
+for capability in capabilities:
+    capabilityBitTable.addRow(f"Capability.{capability.getName()}")
+
+capabilitySetPool = TableEmitter("SpirvCapabilitySet", "capabilitySetPool", qualifiers="private immutable")
+for capabilitySet in capabilitySets:
+    capabilitySetPool.addRow(f"SpirvCapabilitySet([{capabilitySet}])")
+
+extensionSetPool = TableEmitter("SpirvExtensionSet", "extensionSetPool", qualifiers="private immutable")
+for extensionSet in extensionSets:
+    extensionSetPool.addRow(f"SpirvExtensionSet([{extensionSet}])")
+
+module.add(BodyEmitter(f"""/**
+    A set of requirements, indexed by their index in the requirements pool.
+*/
+alias SpirvRequirementSet = SpirvBitSet!{requirementWords};"""))
+
+module.add(capabilityBitTable)
+module.add(capabilitySetPool)
+module.add(extensionSetPool)
+module.add(requirementPool)
+module.add(enumerantRequirements)
+module.add(enumerantRequirementStarts)
+module.add(opRequirements)
+
+# getOpRequirements
+getOpRequirementsFunc = FuncEmitter("ref immutable(SpirvOpRequirements)", "getOpRequirements", [FuncParameter("Op", "code")]).setComment("Gets the capabilities, extensions and SPIR-V version needed by [Op]")
+getOpRequirementsFunc.add(BodyEmitter("return requirementPool[getOpRequirementsIndex(code)];"))
+module.add(getOpRequirementsFunc)
+
+# getEnumerantRequirementsIndex
+getEnumerantRequirementsIndexFunc = FuncEmitter("ushort", "getEnumerantRequirementsIndex", [FuncParameter("SpirvOperandKind", "kind"), FuncParameter("ref immutable(SpirvEnumerantInfo)", "enumerant")])
+getEnumerantRequirementsIndexFunc.setComment("Gets the index of the requirements of [enumerant] of [kind] in the requirements pool.")
+getEnumerantRequirementsIndexFunc.add(BodyEmitter("return enumerantRequirementsTable[enumerantRequirementStarts[kind]+(&enumerant-getEnumerants(kind).ptr)];"))
+module.add(getEnumerantRequirementsIndexFunc)
+
+# getEnumerantRequirements
+getEnumerantRequirementsFunc = FuncEmitter("ref immutable(SpirvOpRequirements)", "getEnumerantRequirements", [FuncParameter("SpirvOperandKind", "kind"), FuncParameter("ref immutable(SpirvEnumerantInfo)", "enumerant")])
+getEnumerantRequirementsFunc.setComment("Gets the capabilities, extensions and SPIR-V version needed by [enumerant] of [kind].")
+getEnumerantRequirementsFunc.add(BodyEmitter("return requirementPool[getEnumerantRequirementsIndex(kind, enumerant)];"))
+module.add(getEnumerantRequirementsFunc)
+
+# getCapabilityBit
+getCapabilityBitFunc = FuncEmitter("size_t", "getCapabilityBit", [FuncParameter("Capability", "capability")])
+getCapabilityBitFunc.setComment("Gets the bit of [capability] in a [SpirvCapabilitySet].\n\nReturns:\n    The bit index, or $(D size_t.max) if [capability] is unknown.")
+getCapabilityBitFunc.add(BodyEmitter("""size_t lo = 0;
+size_t hi = capabilityBitTable.length;
+while (lo < hi) {
+    size_t mid = (lo+hi)/2;
+    if (capabilityBitTable[mid] == capability)
+        return mid;
+
+    if (capabilityBitTable[mid] < capability)
+        lo = mid+1;
+    else
+        hi = mid;
+}
+return size_t.max;"""))
+module.add(getCapabilityBitFunc)
+
+# getCapabilityForBit
+getCapabilityForBitFunc = FuncEmitter("Capability", "getCapabilityForBit", [FuncParameter("size_t", "bit")]).setComment("Gets the capability stored at [bit] in a [SpirvCapabilitySet].")
+getCapabilityForBitFunc.add(BodyEmitter("return capabilityBitTable[bit];"))
+module.add(getCapabilityForBitFunc)
+
+# getOpCapabilities
+getOpCapabilitiesFunc = FuncEmitter("ref immutable(SpirvCapabilitySet)", "getOpCapabilities", [FuncParameter("Op", "code")]).setComment("Gets the set of capabilities, any of which enables [Op]")
+getOpCapabilitiesFunc.add(BodyEmitter("return capabilitySetPool[getOpRequirements(code).capabilitySet];"))
+module.add(getOpCapabilitiesFunc)
+
+# getOpExtensions
+getOpExtensionsFunc = FuncEmitter("ref immutable(SpirvExtensionSet)", "getOpExtensions", [FuncParameter("Op", "code")]).setComment("Gets the set of extensions, any of which enables [Op]")
+getOpExtensionsFunc.add(BodyEmitter("return extensionSetPool[getOpRequirements(code).extensionSet];"))
+module.add(getOpExtensionsFunc)
+
+# getOpMinVersion
+getOpMinVersionFunc = FuncEmitter("uint", "getOpMinVersion", [FuncParameter("Op", "code")]).setComment("Gets the minimum SPIR-V version word for [Op],\n[SpirvVersionNone] if [Op] is only available through extensions.")
+getOpMinVersionFunc.add(BodyEmitter("return getOpRequirements(code).minVersion;"))
+module.add(getOpMinVersionFunc)
+
+# SpirvRequirements
+module.add(BodyEmitter("""/**
+    Callback used by [SpirvRequirements.foreachRequirement].
+*/
+alias SpirvRequirementsVisitor = void delegate(ref immutable(SpirvOpRequirements) requirements) @nogc;
+
+/**
+    Accumulated requirements of a stream of instructions.
+
+    Every opcode and enumerant used adds its requirements as a whole,
+    as any one of their capabilities or extensions enables it. Check
+    them against the features of a device with [isSatisfiedBy].
+*/
+struct SpirvRequirements {
+@nogc:
+
+    /**
+        The requirements used by the instructions.
+    */
+    SpirvRequirementSet requirements;
+
+    /**
+        Minimum SPIR-V version in which every opcode and enumerant used
+        is part of the core, opcodes and enumerants only available
+        through extensions do not count towards it.
+    */
+    uint minVersion = SpirvVersionNone;
+
+    /**
+        Adds the requirements at [index] in the requirements pool.
+    */
+    void add(ushort index) {
+        requirements.set(index);
+        if (requirementPool[index].minVersion > minVersion)
+            minVersion = requirementPool[index].minVersion;
+    }
+
+    /**
+        Adds the requirements of [code].
+    */
+    void add(Op code) {
+        this.add(getOpRequirementsIndex(code));
+    }
+
+    /**
+        Adds the requirements of the enumerant [value] of [kind].
+    */
+    void add(SpirvOperandKind kind, uint value) {
+        foreachEnumerant(kind, value, (ref immutable(SpirvEnumerantInfo) enumerant) {
+            this.add(getEnumerantRequirementsIndex(kind, enumerant));
+        });
+    }
+
+    /**
+        Adds the requirements of an instruction, including
+        the enumerants used by its operands.
+    */
+    void add(Op code, const(uint)[] operands) {
+        this.add(code);
+        walkOperands(code, operands, (SpirvOperandKind kind, size_t offset, size_t length) {
+            auto category = getOperandKindInfo(kind).category;
+            if (category == SpirvOperandCategory.valueEnum || category == SpirvOperandCategory.bitEnum)
+                this.add(kind, operands[offset]);
+        });
+    }
+
+    /**
+        Calls [visitor] for every distinct set of requirements used.
+    */
+    void foreachRequirement(scope SpirvRequirementsVisitor visitor) const {
+        foreach(index; 0..requirementPool.length) {
+            if (requirements.has(index))
+                visitor(requirementPool[index]);
+        }
+    }
+
+    /**
+        Whether a device supporting [capabilities] and [extensions] can
+        use every opcode and enumerant used with SPIR-V [version].
+    */
+    bool isSatisfiedBy(ref const(SpirvCapabilitySet) capabilities, ref const(SpirvExtensionSet) extensions, uint version) const {
+        foreach(index; 0..requirementPool.length) {
+            if (requirements.has(index) && !requirementPool[index].isSatisfiedBy(capabilities, extensions, version))
+                return false;
+        }
+        return true;
+    }
+}"""))
+
+file.write(module.emit())
@@ -0,0 +1,564 @@
+from common import *
+from array import array
+import random
+import time
+import re
+import os
+import sys
+
+GRAMMAR_FILE = "spirv.core.grammar.json"
+OUTPUT_DIR = "../bench/corpus/synthetic"
+
+# Extended instruction sets the corpus may import.
+EXTINST_GRAMMARS = {
+    "GLSL.std.450": "extinst.glsl.std.450.grammar.json",
+}
+
+SPIRV_MAGIC = 0x07230203
+SPIRV_VERSION = 0x00010300
+
+# Instructions a helper function holds before a new one is started,
+# the entry point calls every helper function.
+FUNCTION_INSTRUCTIONS = 2048
+
+# Amount of recent values per type operands are picked from.
+VALUE_WINDOW = 32
+
+# Sections of a module, in the order the logical layout requires.
+SECTIONS = [
+    "capabilities",
+    "extensions",
+    "imports",
+    "memoryModel",
+    "entryPoints",
+    "executionModes",
+    "debug",
+    "annotations",
+    "globals",
+    "functions",
+]
+
+# Arithmetic instructions and the value types of their result and operands.
+CORE_OPS = [
+    ("OpFAdd", "float", ["float", "float"]),
+    ("OpFSub", "float", ["float", "float"]),
+    ("OpFMul", "float", ["float", "float"]),
+    ("OpFDiv", "float", ["float", "float"]),
+    ("OpFAdd", "vec4", ["vec4", "vec4"]),
+    ("OpFSub", "vec4", ["vec4", "vec4"]),
+    ("OpFMul", "vec4", ["vec4", "vec4"]),
+    ("OpIAdd", "int", ["int", "int"]),
+    ("OpISub", "int", ["int", "int"]),
+    ("OpIMul", "int", ["int", "int"]),
+    ("OpBitwiseAnd", "int", ["int", "int"]),
+    ("OpBitwiseXor", "int", ["int", "int"]),
+    ("OpConvertSToF", "float", ["int"]),
+    ("OpConvertFToS", "int", ["float"]),
+    ("OpDot", "float", ["vec4", "vec4"]),
+    ("OpVectorTimesScalar", "vec4", ["vec4", "float"]),
+    ("OpCompositeConstruct", "vec4", ["float", "float", "float", "float"]),
+]
+
+# GLSL.std.450 instructions whose operands share the type of their result.
+GLSL_OPS = {
+    "float": ["Sin", "Cos", "Sqrt", "FAbs", "Floor", "Fract", "Exp", "Log", "Pow", "FMin", "FMax", "FMix", "FClamp"],
+    "vec4": ["Sin", "Cos", "FAbs", "Normalize", "FMin", "FMax", "FMix"],
+    "int": ["SAbs", "SMin", "SMax", "SClamp"],
+}
+
+# Decorations applied to values, neither takes parameters.
+# NoContraction is only valid on arithmetic instructions.
+VALUE_DECORATIONS = ["RelaxedPrecision"]
+ARITHMETIC_DECORATIONS = ["RelaxedPrecision", "NoContraction"]
+
+# Instruction classes which may not appear in a function body.
+EXCLUDED_CLASSES = [
+    None,
+    "Miscellaneous",
+    "Debug",
+    "Annotation",
+    "Extension",
+    "Mode-Setting",
+    "Type-Declaration",
+    "Constant-Creation",
+    "Function",
+    "Control-Flow",
+]
+
+# Words used to make up debug names.
+NAME_WORDS = [
+    "color", "normal", "position", "light", "shadow", "albedo", "depth", "uv",
+    "tangent", "weight", "offset", "scale", "bias", "factor", "result", "tmp",
+]
+
+class CorpusOptions:
+    def __init__(self):
+        self.seed = 0
+        self.count = 1
+        self.sizes = (64 * 1024, 64 * 1024)
+        self.idDensity = 0.9
+        self.decorationDensity = 0.1
+        self.nameDensity = 0.2
+        self.vendorDensity = 0.0
+        self.outputDir = OUTPUT_DIR
+
+    # Gets the size in bytes of file [index], sizes between the
+    # smallest and largest are spread out geometrically.
+    def getSize(self, index: int) -> int:
+        low, high = self.sizes
+        if self.count == 1 or low == high:
+            return low
+        return int(low * (high / low) ** (index / (self.count - 1)))
+
+# Encodes instructions of a module through the grammar, verifying
+# the amount of operand words of every instruction written.
+class SpirvModuleBuilder:
+    def __init__(self, scanner: SpirvGrammarScanner):
+        self.scanner = scanner
+        self.sections = { name: array("I") for name in SECTIONS }
+        self.bound = 1
+        self.instructionCount = 0
+        self.capabilities = set[str]()
+        self.extensions = set[str]()
+        self.instrCache = dict[str, tuple[int, int, int]]()
+        self.enumCache = dict[tuple[str, str], int]()
+        self.stringCache = dict[str, list[int]]()
+
+    def newId(self) -> int:
+        id = self.bound
+        self.bound += 1
+        return id
+
+    def getEnumValue(self, kind: str, name: str) -> int:
+        key = (kind, name)
+        if key not in self.enumCache:
+            for enumerant in self.scanner.getOperandKind(kind).getEnumerants():
+                if enumerant.getName() == name or name in enumerant.getAliases():
+                    self.enumCache[key] = enumerant.getValue()
+                    break
+            else:
+                raise KeyError(f"{kind} has no enumerant {name}")
+        return self.enumCache[key]
+
+    def encodeString(self, text: str) -> list[int]:
+        if text not in self.stringCache:
+            data = text.encode("utf-8") + b"\0"
+            data += b"\0" * (-len(data) % 4)
+            self.stringCache[text] = [int.from_bytes(data[i:i+4], "little") for i in range(0, len(data), 4)]
+        return self.stringCache[text]
+
+    # Writes [opname] to [section], operands are either words, strings
+    # or (kind, enumerant) tuples.
+    def add(self, section: str, opname: str, *operands):
+        if opname not in self.instrCache:
+            instr = self.scanner.getInstructionByName(opname)
+            assert instr != None, f"Unknown instruction {opname}!"
+            self.instrCache[opname] = (instr.getOpCode(), *self.scanner.getWordRange(instr))
+        opcode, minWords, maxWords = self.instrCache[opname]
+
+        words = list[int]()
+        for operand in operands:
+            if isinstance(operand, int):
+                words.append(operand)
+            elif isinstance(operand, str):
+                words.extend(self.encodeString(operand))
+            else:
+                words.append(self.getEnumValue(*operand))
+        self.addWords(section, opcode, words, minWords, maxWords, opname)
+
+    def addWords(self, section: str, opcode: int, words: list[int], minWords: int, maxWords: int, opname: str):
+        assert minWords <= len(words) <= maxWords, f"{opname} takes {minWords}..{maxWords} operand words, got {len(words)}!"
+        out = self.sections[section]
+        out.append(((len(words) + 1) << 16) | opcode)
+        out.extend(words)
+        self.instructionCount += 1
+
+    def getSize(self) -> int:
+        return (5 + sum(len(words) for words in self.sections.values())) * 4
+
+    # Gets the words of the module, the capabilities and extensions
+    # required are written first.
+    def build(self) -> array:
+        for capability in sorted(self.capabilities):
+            self.add("capabilities", "OpCapability", ("Capability", capability))
+        for extension in sorted(self.extensions):
+            self.add("extensions", "OpExtension", extension)
+
+        words = array("I", [SPIRV_MAGIC, SPIRV_VERSION, 0, self.bound, 0])
+        for name in SECTIONS:
+            words.extend(self.sections[name])
+        return words
+
+# Generates instructions of vendor extensions with random operands,
+# they follow the operand layout of the grammar but carry no meaning.
+class VendorInstrGenerator:
+    def __init__(self, scanner: SpirvGrammarScanner):
+        self.scanner = scanner
+        self.instructions = [instr for instr in scanner.getInstructions() if self.isCandidate(instr)]
+
+    # Vendor instructions carry the vendor in their name, as in OpFPGARegINTEL.
+    def isVendor(self, instr: SpirvInstrInfo) -> bool:
+        match = re.search(r"[a-z0-9]([A-Z]{2,})$", instr.getOpName())
+        return match != None and match.group(1) != "KHR"
+
+    def isCandidate(self, instr: SpirvInstrInfo) -> bool:
+        if not self.isVendor(instr) or instr.getClass() in EXCLUDED_CLASSES:
+            return False
+        if not instr.hasResult() or not instr.hasResultType():
+            return False
+        return all(self.isSupported(operand.getKind()) for operand in instr.getOperands())
+
+    def isSupported(self, kind: str) -> bool:
+        if kind in ("LiteralContextDependentNumber", "LiteralExtInstInteger", "LiteralSpecConstantOpInteger"):
+            return False
+
+        info = self.scanner.getOperandKind(kind)
+        if info.getCategory() == "Composite":
+            return all(self.isSupported(base) for base in info.getBases())
+        if info.isEnum():
+            return len(self.getEnumerants(kind)) > 0
+        return True
+
+    # Enumerants without parameters, so that every operand is a single word.
+    def getEnumerants(self, kind: str) -> list[SpirvEnumerantInfo]:
+        return [enumerant for enumerant in self.scanner.getOperandKind(kind).getEnumerants() if len(enumerant.getParameters()) == 0]
+
+    def encodeOperand(self, rng: random.Random, kind: str, words: list[int], types: list[int], values: list[int], builder: SpirvModuleBuilder):
+        info = self.scanner.getOperandKind(kind)
+        category = info.getCategory()
+        if kind == "IdResultType":
+            words.append(rng.choice(types))
+        elif kind == "IdResult":
+            words.append(builder.newId())
+        elif category == "Id":
+            words.append(rng.choice(values))
+        elif category == "Composite":
+            for base in info.getBases():
+                self.encodeOperand(rng, base, words, types, values, builder)
+        elif category == "ValueEnum" or category == "BitEnum":
+            words.append(rng.choice(self.getEnumerants(kind)).getValue())
+        elif kind == "LiteralString":
+            words.extend(builder.encodeString(rng.choice(NAME_WORDS)))
+        else:
+            words.append(rng.randrange(0, 16))
+
+    # Writes a random vendor instruction to [section], returning its result.
+    def add(self, rng: random.Random, builder: SpirvModuleBuilder, section: str, types: list[int], values: list[int]) -> int:
+        instr = rng.choice(self.instructions)
+        words = list[int]()
+        for operand in instr.getOperands():
+            quantifier = operand.getQuantifier()
+            if quantifier == "?" and rng.random() < 0.5:
+
+                # Optional operands are positional, skipping one skips the rest.
+                break
+            repeat = rng.randrange(0, 3) if quantifier == "*" else 1
+            for _ in range(repeat):
+                self.encodeOperand(rng, operand.getKind(), words, types, values, builder)
+
+        if len(instr.getCapabilities()) > 0:
+            builder.capabilities.add(instr.getCapabilities()[0])
+        if len(instr.getExtensions()) > 0:
+            builder.extensions.add(instr.getExtensions()[0])
+
+        minWords, maxWords = self.scanner.getWordRange(instr)
+        builder.addWords(section, instr.getOpCode(), words, minWords, maxWords, instr.getOpName())
+        return words[instr.getSummary().resultIndex]
+
+# Generates a single module of roughly [size] bytes.
+class CorpusModuleGenerator:
+    def __init__(self, scanner: SpirvGrammarScanner, vendor: VendorInstrGenerator, options: CorpusOptions, rng: random.Random):
+        self.scanner = scanner
+        self.vendor = vendor
+        self.options = options
+        self.rng = rng
+        self.builder = SpirvModuleBuilder(scanner)
+
+        # Extended instructions as (opcode, operand count) by name.
+        self.glslOps = dict[str, tuple[int, int]]()
+        for extInstSet in scanner.getExtInstSets():
+            if extInstSet.getName() == "GLSL.std.450":
+                for instr in extInstSet.getInstructions():
+                    self.glslOps[instr.getOpName()] = (instr.getOpCode(), len(instr.getOperands()))
+
+        self.arithmeticOps = { opname for opname, _, _ in CORE_OPS if scanner.getInstructionByName(opname).getClass() == "Arithmetic" }
+
+        self.types = dict[str, int]()
+        self.constants = dict[str, list[int]]()
+        self.privates = dict[str, list[int]]()
+        self.uniformPointers = dict[str, int]()
+        self.uniformMembers = list[str]()
+        self.inputs = list[int]()
+        self.outputs = list[int]()
+
+    def addName(self, id: int):
+        if self.rng.random() < self.options.nameDensity:
+            self.builder.add("debug", "OpName", id, f"{self.rng.choice(NAME_WORDS)}{id}")
+
+    def addDecoration(self, id: int, arithmetic: bool = False):
+        if self.rng.random() < self.options.decorationDensity:
+            decorations = ARITHMETIC_DECORATIONS if arithmetic else VALUE_DECORATIONS
+            self.builder.add("annotations", "OpDecorate", id, ("Decoration", self.rng.choice(decorations)))
+
+    def addDeclarations(self):
+        b = self.builder
+        b.capabilities.add("Shader")
+        self.glsl = b.newId()
+        self.main = b.newId()
+        b.add("imports", "OpExtInstImport", self.glsl, "GLSL.std.450")
+        b.add("memoryModel", "OpMemoryModel", ("AddressingModel", "Logical"), ("MemoryModel", "GLSL450"))
+        b.add("executionModes", "OpExecutionMode", self.main, ("ExecutionMode", "OriginUpperLeft"))
+        b.add("debug", "OpSource", ("SourceLanguage", "GLSL"), 450)
+        b.add("debug", "OpName", self.main, "main")
+
+        self.types = { name: b.newId() for name in ["void", "fn", "float", "int", "vec4", "ubo"] }
+        b.add("globals", "OpTypeVoid", self.types["void"])
+        b.add("globals", "OpTypeFunction", self.types["fn"], self.types["void"])
+        b.add("globals", "OpTypeFloat", self.types["float"], 32)
+        b.add("globals", "OpTypeInt", self.types["int"], 32, 1)
+        b.add("globals", "OpTypeVector", self.types["vec4"], self.types["float"], 4)
+
+        # Scalar constants, the integers double as member indices.
+        for name in ["float", "int"]:
+            self.constants[name] = list[int]()
+            for i in range(4):
+                id = b.newId()
+                value = i if name == "int" else (0x3F800000 + (i << 20))
+                b.add("globals", "OpConstant", self.types[name], id, value)
+                self.constants[name].append(id)
+
+        self.constants["vec4"] = list[int]()
+        for i in range(2):
+            id = b.newId()
+            b.add("globals", "OpConstantComposite", self.types["vec4"], id, *self.rng.sample(self.constants["float"], 4))
+            self.constants["vec4"].append(id)
+
+        # Uniform block
+        self.uniformMembers = ["vec4", "vec4", "float", "int"]
+        b.add("globals", "OpTypeStruct", self.types["ubo"], *[self.types[member] for member in self.uniformMembers])
+        b.add("annotations", "OpDecorate", self.types["ubo"], ("Decoration", "Block"))
+        b.add("debug", "OpName", self.types["ubo"], "Uniforms")
+        offset = 0
+        for i, member in enumerate(self.uniformMembers):
+            b.add("debug", "OpMemberName", self.types["ubo"], i, f"{NAME_WORDS[i]}")
+            b.add("annotations", "OpMemberDecorate", self.types["ubo"], i, ("Decoration", "Offset"), offset)
+            offset += 16 if member == "vec4" else 4
+
+        uboPointer = b.newId()
+        self.ubo = b.newId()
+        b.add("globals", "OpTypePointer", uboPointer, ("StorageClass", "Uniform"), self.types["ubo"])
+        b.add("globals", "OpVariable", uboPointer, self.ubo, ("StorageClass", "Uniform"))
+        b.add("annotations", "OpDecorate", self.ubo, ("Decoration", "DescriptorSet"), 0)
+        b.add("annotations", "OpDecorate", self.ubo, ("Decoration", "Binding"), 0)
+
+        for name in ["float", "int", "vec4"]:
+            self.uniformPointers[name] = b.newId()
+            b.add("globals", "OpTypePointer", self.uniformPointers[name], ("StorageClass", "Uniform"), self.types[name])
+
+        # Interface variables
+        for storageClass, variables in (("Input", self.inputs), ("Output", self.outputs)):
+            pointer = b.newId()
+            b.add("globals", "OpTypePointer", pointer, ("StorageClass", storageClass), self.types["vec4"])
+            for i in range(2):
+                id = b.newId()
+                b.add("globals", "OpVariable", pointer, id, ("StorageClass", storageClass))
+                b.add("annotations", "OpDecorate", id, ("Decoration", "Location"), i)
+                b.add("debug", "OpName", id, f"{storageClass.lower()}{i}")
+                variables.append(id)
+
+        # Private variables used by loads and stores.
+        for name in ["float", "int", "vec4"]:
+            pointer = b.newId()
+            b.add("globals", "OpTypePointer", pointer, ("StorageClass", "Private"), self.types[name])
+            self.privates[name] = list[int]()
+            for i in range(2):
+                id = b.newId()
+                b.add("globals", "OpVariable", pointer, id, ("StorageClass", "Private"))
+                self.addName(id)
+                self.privates[name].append(id)
+
+        b.add("entryPoints", "OpEntryPoint", ("ExecutionModel", "Fragment"), self.main, "main", *self.inputs, *self.outputs)
+
+    # Adds a value of [type] to the values of the current function,
+    # [arithmetic] is set for the results of arithmetic instructions.
+    def addValue(self, type: str, id: int, arithmetic: bool = False):
+        values = self.values[type]
+        values.append(id)
+        if len(values) > VALUE_WINDOW:
+            del values[0]
+        self.addName(id)
+        self.addDecoration(id, arithmetic)
+
+    def addBodyInstruction(self):
+        b = self.builder
+        rng = self.rng
+        roll = rng.random()
+
+        if roll < self.options.vendorDensity and len(self.vendor.instructions) > 0:
+            types = [self.types[name] for name in ["float", "int", "vec4"]]
+            values = [id for values in self.values.values() for id in values]
+            id = self.vendor.add(rng, b, "functions", types, values)
+            self.addName(id)
+            self.addDecoration(id)
+            return
+
+        # Instructions without a result keep the id count down.
+        if rng.random() >= self.options.idDensity:
+            type = rng.choice(["float", "int", "vec4"])
+            b.add("functions", "OpStore", rng.choice(self.privates[type]), rng.choice(self.values[type]))
+            return
+
+        choice = rng.randrange(0, 8)
+        if choice == 0:
+            type = rng.choice(["float", "int", "vec4"])
+            id = b.newId()
+            b.add("functions", "OpLoad", self.types[type], id, rng.choice(self.privates[type]))
+            self.addValue(type, id)
+
+        elif choice == 1:
+            index = rng.randrange(0, len(self.uniformMembers))
+            type = self.uniformMembers[index]
+            pointer = b.newId()
+            id = b.newId()
+            b.add("functions", "OpAccessChain", self.uniformPointers[type], pointer, self.ubo, self.constants["int"][index])
+            b.add("functions", "OpLoad", self.types[type], id, pointer)
+            self.addValue(type, id)
+
+        elif choice == 2:
+            id = b.newId()
+            b.add("functions", "OpCompositeExtract", self.types["float"], id, rng.choice(self.values["vec4"]), rng.randrange(0, 4))
+            self.addValue("float", id)
+
+        elif choice == 3:
+            type = rng.choice(["float", "int", "vec4"])
+            opcode, operandCount = self.glslOps[rng.choice(GLSL_OPS[type])]
+            id = b.newId()
+            b.add("functions", "OpExtInst", self.types[type], id, self.glsl, opcode, *[rng.choice(self.values[type]) for _ in range(operandCount)])
+            self.addValue(type, id)
+
+        else:
+            opname, type, operandTypes = rng.choice(CORE_OPS)
+            id = b.newId()
+            b.add("functions", opname, self.types[type], id, *[rng.choice(self.values[operandType]) for operandType in operandTypes])
+            self.addValue(type, id, opname in self.arithmeticOps)
+
+    def beginFunction(self, id: int):
+        b = self.builder
+        b.add("functions", "OpFunction", self.types["void"], id, ("FunctionControl", "None"), self.types["fn"])
+        b.add("functions", "OpLabel", b.newId())
+
+        # Values are only visible within the function defining them.
+        self.values = { name: list(constants) for name, constants in self.constants.items() }
+        for input in self.inputs:
+            value = b.newId()
+            b.add("functions", "OpLoad", self.types["vec4"], value, input)
+            self.values["vec4"].append(value)
+
+    def endFunction(self):
+        self.builder.add("functions", "OpReturn")
+        self.builder.add("functions", "OpFunctionEnd")
+
+    def generate(self, size: int) -> array:
+        b = self.builder
+        self.addDeclarations()
+
+        # Helper functions are added until the module, including the
+        # entry point calling them, reaches the requested size.
+        helpers = list[int]()
+        mainSize = (4 + 3 + 2 * 4 + 2) * 4
+        while b.getSize() + mainSize + len(helpers) * 16 < size:
+            helper = b.newId()
+            helpers.append(helper)
+            self.addName(helper)
+            self.beginFunction(helper)
+
+            count = 0
+            while count < FUNCTION_INSTRUCTIONS and b.getSize() + mainSize + len(helpers) * 16 < size:
+                self.addBodyInstruction()
+                count += 1
+            self.endFunction()
+
+        self.beginFunction(self.main)
+        for helper in helpers:
+            b.add("functions", "OpFunctionCall", self.types["void"], b.newId(), helper)
+        for output in self.outputs:
+            b.add("functions", "OpStore", output, self.rng.choice(self.values["vec4"]))
+        self.endFunction()
+        return b.build()
+
+def parseSize(text: str) -> int:
+    units = { "K": 1024, "M": 1024 * 1024, "G": 1024 * 1024 * 1024 }
+    text = text.strip().upper().removesuffix("B")
+    if len(text) > 0 and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+def parseOption(argv: list[str], option: str) -> str | None:
+    for arg in argv:
+        if arg.startswith(option + "="):
+            return arg[len(option)+1:]
+    return None
+
+def parseDensity(argv: list[str], option: str, default: float) -> float:
+    value = parseOption(argv, option)
+    if value == None:
+        return default
+
+    density = float(value)
+    if density < 0 or density > 1:
+        raise ValueError(f"{option} must be between 0 and 1")
+    return density
+
+def parseOptions(argv: list[str]) -> CorpusOptions:
+    options = CorpusOptions()
+    if parseOption(argv, "--seed") != None:
+        options.seed = int(parseOption(argv, "--seed"))
+    if parseOption(argv, "--count") != None:
+        options.count = max(1, int(parseOption(argv, "--count")))
+    if parseOption(argv, "--out") != None:
+        options.outputDir = parseOption(argv, "--out")
+
+    # Sizes are either a single size or a range, as in 1K..50M.
+    if parseOption(argv, "--size") != None:
+        sizes = [parseSize(size) for size in parseOption(argv, "--size").split("..")]
+        options.sizes = (min(sizes), max(sizes))
+
+    options.idDensity = parseDensity(argv, "--id-density", options.idDensity)
+    options.decorationDensity = parseDensity(argv, "--decoration-density", options.decorationDensity)
+    options.nameDensity = parseDensity(argv, "--name-density", options.nameDensity)
+    options.vendorDensity = parseDensity(argv, "--vendor-density", options.vendorDensity)
+    return options
+
+def main():
+    if "--help" in sys.argv[1:]:
+        print("gen-spv-corpus.py [--seed=N] [--count=N] [--size=SIZE[..SIZE]] [--id-density=F] [--decoration-density=F] [--name-density=F] [--vendor-density=F] [--out=DIR]")
+        exit(-1)
+
+    try:
+        options = parseOptions(sys.argv[1:])
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        exit(-1)
+
+    scanner = SpirvGrammarScanner(GRAMMAR_FILE, EXTINST_GRAMMARS)
+    vendor = VendorInstrGenerator(scanner)
+    os.makedirs(options.outputDir, exist_ok=True)
+
+    for index in range(options.count):
+        begin = time.perf_counter()
+
+        # Every module has its own generator, so that a module
+        # does not depend on the ones before it.
+        rng = random.Random(f"{options.seed}:{index}")
+        generator = CorpusModuleGenerator(scanner, vendor, options, rng)
+        words = generator.generate(options.getSize(index))
+        if sys.byteorder != "little":
+            words.byteswap()
+
+        path = os.path.join(options.outputDir, f"synthetic-{options.seed}-{index:03}.spv")
+        with open(path, "wb") as f:
+            words.tofile(f)
+        print(f"{path}: {len(words) * 4} bytes, {generator.builder.bound} ids, {generator.builder.instructionCount} instructions ({time.perf_counter()-begin:.2f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,301 @@
 from common import *
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import tracemalloc
+import traceback
+import hashlib
+import pickle
+import d_emit
+import json
+import time
 import os
 import io
 import sys
 
-def emit(emitter: str, scanner: SpirvGrammarScanner, file: io.FileIO):
-    program = open(emitter).read()
-    exec(program, {}, { 'scanner': scanner, 'file': file })
-
-if (len(sys.argv) == 1):
-    print("gen-spv-reflection.py <[emitters...] | all>")
-    exit(-1)
-
-scanner = SpirvGrammarScanner("spirv.core.grammar.json")
-fileList = list[str]()
-
-if sys.argv[1] == "all":
-    for file in os.listdir("emitters/"):
-        f = os.path.join("emitters/", file)
-        if os.path.isfile(f):
-            fileList.append(os.path.splitext(file)[0])
-else:
-    fileList = sys.argv[1:]
-
-for name in fileList:
-    f = os.path.join("emitters/", name + ".py")
-    if (os.path.isfile(f)):
-        emit(f, scanner, open(f"../source/spirv/{name}.d", "w"))
\ No newline at end of file
+GRAMMAR_FILE = "spirv.core.grammar.json"
+CACHE_FILE = ".gen-cache.json"
+PROFILE_FILE = "gen-profile.json"
+
+# Growth over a previous profile which is reported as a regression,
+# times are noisy so they need to grow further and by a minimum amount.
+PROFILE_SIZE_THRESHOLD = 0.05
+PROFILE_TIME_THRESHOLD = 0.25
+PROFILE_MIN_SECONDS = 0.05
+
+# Number of runs times are the minimum of when profiling.
+PROFILE_RUNS = 5
+
+# Extended instruction set grammars, keyed by the name
+# modules import them with.
+EXTINST_GRAMMARS = {
+    "GLSL.std.450": "extinst.glsl.std.450.grammar.json",
+    "NonSemantic.Shader.DebugInfo.100": "extinst.nonsemantic.shader.debuginfo.100.grammar.json",
+}
+
+# Files every emitter depends on besides its own script.
+SHARED_INPUTS = [ GRAMMAR_FILE, *EXTINST_GRAMMARS.values(), "common.py", "d_emit.py" ]
+
+def emit(emitter: str, scanner: SpirvGrammarScanner, file: io.StringIO):
+    with open(emitter) as f:
+        program = f.read()
+    exec(program, { 'scanner': scanner, 'file': file })
+
+# Scanner used by emitters running in a worker process.
+workerScanner: SpirvGrammarScanner = None
+
+def initWorker(snapshot: bytes):
+    global workerScanner
+    workerScanner = pickle.loads(snapshot)
+
+# Runs a single emitter, returning its output or the error it raised,
+# along with its profile when [profileRuns] is above 0.
+#
+# Sizes and peak memory are recorded in a first run under tracemalloc,
+# which slows down allocations, so times are the minimum of
+# [profileRuns] further runs with tracemalloc off.
+def runEmitter(name: str, scanner: SpirvGrammarScanner = None, profileRuns: int = 0) -> tuple[str, str | None, str | None, dict | None]:
+    path = os.path.join("emitters/", name + ".py")
+    scanner = scanner if scanner != None else workerScanner
+    buffer = io.StringIO()
+    if profileRuns > 0:
+        d_emit.beginProfile()
+        tracemalloc.start()
+
+    try:
+        emit(path, scanner, buffer)
+    except Exception:
+        if profileRuns > 0:
+            tracemalloc.stop()
+            d_emit.endProfile()
+        return (name, None, traceback.format_exc(), None)
+
+    content = buffer.getvalue()
+    report = None
+    if profileRuns > 0:
+        report = {
+            "emitSeconds": None,
+            "peakBytes": tracemalloc.get_traced_memory()[1],
+            "lines": content.count("\n"),
+            "bytes": len(content.encode("utf-8")),
+            "sections": dict[str, dict](),
+        }
+        tracemalloc.stop()
+
+        sectionNames = list[str]()
+        for section in d_emit.endProfile():
+            sectionName = section.pop("name")
+            while sectionName in report["sections"]:
+                sectionName += "'"
+            section["emitSeconds"] = None
+            report["sections"][sectionName] = section
+            sectionNames.append(sectionName)
+
+        # Sections are emitted in the same order on every run.
+        for _ in range(profileRuns):
+            d_emit.beginProfile()
+            begin = time.perf_counter()
+            emit(path, scanner, io.StringIO())
+            seconds = time.perf_counter()-begin
+
+            report["emitSeconds"] = seconds if report["emitSeconds"] == None else min(report["emitSeconds"], seconds)
+            for sectionName, section in zip(sectionNames, d_emit.endProfile()):
+                entry = report["sections"][sectionName]
+                entry["emitSeconds"] = section["emitSeconds"] if entry["emitSeconds"] == None else min(entry["emitSeconds"], section["emitSeconds"])
+    return (name, content, None, report)
+
+def hashFiles(files: list[str]) -> str:
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def loadCache() -> dict[str, str]:
+    try:
+        with open(CACHE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict[str, str]()
+
+def saveCache(cache: dict[str, str]):
+    with open(CACHE_FILE, "w") as f:
+        json.dump(cache, f, indent=4, sort_keys=True)
+
+# Writes the output file only if its content changed, so that
+# the D build does not see a new timestamp for identical code.
+def writeIfChanged(path: str, content: str) -> bool:
+    if os.path.isfile(path):
+        with open(path) as f:
+            if f.read() == content:
+                return False
+
+    with open(path, "w") as f:
+        f.write(content)
+    return True
+
+def loadProfile(path: str) -> dict | None:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+# Gets whether [value] grew by more than [threshold] over [previous].
+def hasGrown(previous: float, value: float, threshold: float) -> bool:
+    return previous > 0 and (value-previous) / previous > threshold
+
+# Compares a profile against a previous one, returning a description
+# of every size regression found and of every time regression found.
+def compareProfiles(previous: dict, current: dict) -> tuple[list[str], list[str]]:
+    regressions = list[str]()
+    timeRegressions = list[str]()
+    if current["scanSeconds"] > PROFILE_MIN_SECONDS and hasGrown(previous.get("scanSeconds", 0), current["scanSeconds"], PROFILE_TIME_THRESHOLD):
+        timeRegressions.append(f"scan: scanSeconds {previous['scanSeconds']:.3f} -> {current['scanSeconds']:.3f}")
+
+    for name, emitter in current["emitters"].items():
+        if name not in previous["emitters"]:
+            continue
+
+        old = previous["emitters"][name]
+        entries = [(name, old, emitter)]
+        for sectionName, section in emitter["sections"].items():
+            if sectionName in old["sections"]:
+                entries.append((f"{name}.{sectionName}", old["sections"][sectionName], section))
+
+        for entryName, oldEntry, entry in entries:
+            for key in ("lines", "bytes"):
+                if hasGrown(oldEntry[key], entry[key], PROFILE_SIZE_THRESHOLD):
+                    regressions.append(f"{entryName}: {key} {oldEntry[key]} -> {entry[key]}")
+
+            if "peakBytes" in entry and hasGrown(oldEntry["peakBytes"], entry["peakBytes"], PROFILE_TIME_THRESHOLD):
+                regressions.append(f"{entryName}: peakBytes {oldEntry['peakBytes']} -> {entry['peakBytes']}")
+
+            if entry["emitSeconds"] > PROFILE_MIN_SECONDS and hasGrown(oldEntry["emitSeconds"], entry["emitSeconds"], PROFILE_TIME_THRESHOLD):
+                timeRegressions.append(f"{entryName}: emitSeconds {oldEntry['emitSeconds']:.3f} -> {entry['emitSeconds']:.3f}")
+    return (regressions, timeRegressions)
+
+def parseOption(argv: list[str], option: str, default: str) -> str | None:
+    for arg in argv:
+        if arg.startswith(option + "="):
+            return arg[len(option)+1:]
+        if arg == option:
+            return default
+    return None
+
+def parseJobs(argv: list[str]) -> int:
+    for arg in argv:
+        if arg.startswith("--jobs="):
+            return max(1, int(arg[len("--jobs="):]))
+        if arg == "--jobs":
+            return os.cpu_count() or 1
+    return 1
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    force = "--force" in sys.argv[1:]
+    jobs = parseJobs(sys.argv[1:])
+    profilePath = parseOption(sys.argv[1:], "--profile", PROFILE_FILE)
+    comparePath = parseOption(sys.argv[1:], "--compare", PROFILE_FILE)
+    profileRuns = parseOption(sys.argv[1:], "--profile-runs", str(PROFILE_RUNS))
+    failOnRegression = "--fail-on-regression" in sys.argv[1:]
+    failOnTimeRegression = "--fail-on-time-regression" in sys.argv[1:]
+
+    if (len(args) == 0):
+        print("gen-spv-reflection.py [--force] [--jobs[=N]] [--profile[=FILE]] [--profile-runs=N] [--compare[=FILE]] [--fail-on-regression] [--fail-on-time-regression] <[emitters...] | all>")
+        exit(-1)
+
+    # Profiling needs every emitter to run.
+    profile = profilePath != None
+    if profile:
+        force = True
+    profileRuns = max(1, int(profileRuns if profileRuns != None else PROFILE_RUNS)) if profile else 0
+
+    fileList = list[str]()
+
+    if args[0] == "all":
+        for file in sorted(os.listdir("emitters/")):
+            f = os.path.join("emitters/", file)
+            if os.path.isfile(f) and f.endswith(".py"):
+                fileList.append(os.path.splitext(file)[0])
+    else:
+        fileList = args
+
+    cache = loadCache()
+    sharedHash = hashFiles(SHARED_INPUTS)
+    pending = list[str]()
+    hashes = dict[str, str]()
+
+    for name in fileList:
+        f = os.path.join("emitters/", name + ".py")
+        if (not os.path.isfile(f)):
+            print(f"{name}: no such emitter")
+            continue
+
+        # Skip emitters whose inputs have not changed since the last run.
+        hashes[name] = hashFiles([f]) + sharedHash
+        if not force and cache.get(name) == hashes[name] and os.path.isfile(f"../source/spirv/{name}.d"):
+            print(f"{name}: up to date")
+            continue
+        pending.append(name)
+
+    # The grammar is only parsed once something needs generating.
+    results = list[tuple[str, str | None, str | None, dict | None]]()
+    scanSeconds = 0
+    if len(pending) > 0:
+        for _ in range(max(profileRuns, 1)):
+            begin = time.perf_counter()
+            scanner = SpirvGrammarScanner(GRAMMAR_FILE, EXTINST_GRAMMARS)
+            seconds = time.perf_counter()-begin
+            scanSeconds = seconds if scanSeconds == 0 else min(scanSeconds, seconds)
+
+        if jobs > 1 and len(pending) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(pending)), initializer=initWorker, initargs=(pickle.dumps(scanner),)) as pool:
+                results = list(pool.map(runEmitter, pending, itertools.repeat(None), itertools.repeat(profileRuns)))
+        else:
+            results = [runEmitter(name, scanner, profileRuns) for name in pending]
+
+    # Results are handled in the order the emitters were given.
+    failed = False
+    report = { "scanSeconds": scanSeconds, "emitters": dict[str, dict]() }
+    for name, content, error, emitterReport in results:
+        if error != None:
+            print(f"{name}: failed\n{error}", file=sys.stderr)
+            failed = True
+            continue
+
+        changed = writeIfChanged(f"../source/spirv/{name}.d", content)
+        cache[name] = hashes[name]
+        print(f"{name}: {'written' if changed else 'unchanged'}")
+
+        if emitterReport != None:
+            report["emitters"][name] = emitterReport
+
+    saveCache(cache)
+
+    # Times vary between machines and runs, so only sizes fail
+    # the run unless time regressions are asked for.
+    regressions = list[str]()
+    timeRegressions = list[str]()
+    if profile:
+        previous = loadProfile(comparePath if comparePath != None else profilePath)
+        if previous != None:
+            regressions, timeRegressions = compareProfiles(previous, report)
+            for regression in regressions:
+                print(f"regression: {regression}", file=sys.stderr)
+            for regression in timeRegressions:
+                print(f"time regression: {regression}", file=sys.stderr)
+
+        with open(profilePath, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"profile written to {profilePath}, {len(regressions)} regression(s), {len(timeRegressions)} time regression(s)")
+
+    if failed:
+        exit(1)
+    if failOnRegression and len(regressions) > 0:
+        exit(2)
+    if failOnTimeRegression and len(timeRegressions) > 0:
+        exit(2)
+
+# Guarded so worker processes can import this script.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import importlib.util
+import random
+import os
+import sys
+import pytest
+
+np = pytest.importorskip("numpy")
+
+GENERATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GENERATOR_DIR)
+
+# The tools are scripts rather than modules, and find their
+# grammars relative to the generator directory.
+def loadScript(name: str):
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(GENERATOR_DIR, name + ".py"))
+    script = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(script)
+    return script
+
+@pytest.fixture(scope="module")
+def tools():
+    cwd = os.getcwd()
+    os.chdir(GENERATOR_DIR)
+    try:
+        corpus = loadScript("gen-spv-corpus")
+        analyzer = loadScript("analyze-spv-corpus")
+        scanner = corpus.SpirvGrammarScanner(corpus.GRAMMAR_FILE, corpus.EXTINST_GRAMMARS)
+        yield corpus, analyzer, scanner
+    finally:
+        os.chdir(cwd)
+
+def generateModule(tools, seed: int, size: int):
+    corpus, _, scanner = tools
+    options = corpus.CorpusOptions()
+    options.decorationDensity = 0.5
+    generator = corpus.CorpusModuleGenerator(scanner, corpus.VendorInstrGenerator(scanner), options, random.Random(seed))
+    return generator, generator.generate(size)
+
+# Walks the instruction stream one instruction at a time.
+def walkInstructions(words) -> list[int]:
+    starts = list[int]()
+    i = 5
+    while i < len(words):
+        starts.append(i)
+        i += words[i] >> 16
+    return starts
+
+def test_generate_is_deterministic(tools):
+    _, first = generateModule(tools, 7, 16 * 1024)
+    _, second = generateModule(tools, 7, 16 * 1024)
+    assert first == second
+
+def test_analyze_matches_builder(tools, tmp_path):
+    corpus, analyzer, scanner = tools
+    generator, words = generateModule(tools, 1, 64 * 1024)
+    path = tmp_path / "module.spv"
+    with open(path, "wb") as f:
+        words.tofile(f)
+
+    report = analyzer.analyzeFile(str(path), analyzer.AnalyzerTables(scanner))
+    assert "error" not in report
+    assert not report["malformed"]
+    assert report["bound"] == generator.builder.bound
+    assert report["instructions"] == generator.builder.instructionCount
+    assert sum(report["opcodes"].values()) == generator.builder.instructionCount
+
+    starts, malformed = analyzer.findInstructionStarts(np.asarray(words, dtype=np.uint32))
+    assert not malformed
+    assert starts.tolist() == walkInstructions(words)
+
+def test_no_contraction_only_on_arithmetic(tools):
+    corpus, _, scanner = tools
+    generator, words = generateModule(tools, 3, 64 * 1024)
+
+    decorate = scanner.getInstructionByName("OpDecorate").getOpCode()
+    noContraction = generator.builder.getEnumValue("Decoration", "NoContraction")
+    results = dict[int, int]()
+    targets = list[int]()
+    for start in walkInstructions(words):
+        instr = scanner.getInstruction(words[start] & 0xFFFF)
+        if instr.getOpCode() == decorate and words[start+2] == noContraction:
+            targets.append(words[start+1])
+        elif instr.hasResult():
+            results[words[start+1+instr.hasResultType()]] = instr.getOpCode()
+
+    assert len(targets) > 0
+    for target in targets:
+        assert scanner.getInstruction(results[target]).getClass() == "Arithmetic"